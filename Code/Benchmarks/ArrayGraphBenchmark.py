@@ -0,0 +1,79 @@
+#Array graph benchmark
+#Compares memory use and lookup speed of the object Graph against the CSR ArrayGraph on random graphs
+#Run from the Code folder: python -m Benchmarks.ArrayGraphBenchmark [nr of edges ...] [array] [hub]
+#Passing "array" skips the object graph, which does not fit in memory at 10^7 edges on most machines
+#Passing "hub" lets every second edge start at node 0, so half of the lookups are on a node with half of the edges
+
+import sys
+import time
+import tracemalloc
+import numpy
+
+from GraphEngine.KnowledgeGraph import Node, Edge, Graph
+from GraphEngine.ArrayGraph import ArrayGraph
+
+
+
+def random_edges(nr_of_edges, seed = 1, hub = False):
+    generator = numpy.random.default_rng(seed)
+    nr_of_nodes = max(2, nr_of_edges // 8)
+    from_ids = generator.integers(0, nr_of_nodes, nr_of_edges)
+    if hub:
+        from_ids[::2] = 0
+    to_ids = (from_ids + generator.integers(1, nr_of_nodes, nr_of_edges)) % nr_of_nodes
+    label_pool = [f"label-{count}" for count in range(max(1, nr_of_edges // 100))]
+    labels = [label_pool[index] for index in generator.integers(0, len(label_pool), nr_of_edges).tolist()]
+    return nr_of_nodes, from_ids, to_ids, labels
+
+def build_object_graph(nr_of_nodes, from_ids, to_ids, labels):
+    nodes = [Node(str(node_id), id = node_id) for node_id in range(0, nr_of_nodes)]
+    edges = [Edge(nodes[from_id], nodes[to_id], label, id = edge_id) for edge_id, (from_id, to_id, label) in enumerate(zip(from_ids.tolist(), to_ids.tolist(), labels))]
+    return Graph(nodes, edges)
+
+def build_array_graph(nr_of_nodes, from_ids, to_ids, labels):
+    return ArrayGraph(numpy.arange(nr_of_nodes), from_ids, to_ids, labels)
+
+def measure_build(build, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = build(*args)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return graph, elapsed, memory
+
+def measure_lookups(graph, node_pairs):
+    start = time.perf_counter()
+    for node_a, node_b in node_pairs:
+        graph.get_edges_between(node_a, node_b)
+    return (time.perf_counter() - start) / len(node_pairs)
+
+def measure_triples(graph):
+    start = time.perf_counter()
+    graph.triples
+    return time.perf_counter() - start
+
+def print_result(name, nr_of_edges, build_time, memory, lookup_time, triples_time):
+    print(f"{name:>7} {nr_of_edges:>10} edges: build {build_time:7.2f} s  memory {memory/1024**2:9.1f} MiB ({memory/nr_of_edges:6.1f} B/edge)  get_edges_between {lookup_time*1e6:7.2f} us  triples {triples_time:6.2f} s")
+
+def benchmark(nr_of_edges, include_object_graph, hub = False, nr_of_lookups = 100000):
+    nr_of_nodes, from_ids, to_ids, labels = random_edges(nr_of_edges, hub = hub)
+    lookup_ids = numpy.random.default_rng(2).integers(0, nr_of_edges, nr_of_lookups)
+    node_id_pairs = list(zip(from_ids[lookup_ids].tolist(), to_ids[lookup_ids].tolist()))
+
+    array_graph, build_time, memory = measure_build(build_array_graph, nr_of_nodes, from_ids, to_ids, labels)
+    print_result("Array", nr_of_edges, build_time, memory, measure_lookups(array_graph, node_id_pairs), measure_triples(array_graph))
+    del array_graph
+
+    if include_object_graph:
+        object_graph, build_time, memory = measure_build(build_object_graph, nr_of_nodes, from_ids, to_ids, labels)
+        node_pairs = [(object_graph.get_node(id_a), object_graph.get_node(id_b)) for id_a, id_b in node_id_pairs]
+        print_result("Object", nr_of_edges, build_time, memory, measure_lookups(object_graph, node_pairs), measure_triples(object_graph))
+
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    sizes = sizes if len(sizes) > 0 else [10**6, 10**7]
+    for nr_of_edges in sizes:
+        benchmark(nr_of_edges, "array" not in sys.argv[1:], "hub" in sys.argv[1:])
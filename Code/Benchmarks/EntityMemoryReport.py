@@ -0,0 +1,142 @@
+#Entity memory report
+#Generates a network and reports, with tracemalloc, how many bytes each node, edge, triple and link costs, next to the
+#cost of the same entity laid out like before __slots__ (instance dicts, Identifier objects and eagerly made containers)
+#Run from the Code folder: python -m Benchmarks.EntityMemoryReport [config file]
+
+import sys
+import gc
+import tracemalloc
+
+from HelpFiles.FileModules import load_config
+from GraphEngine.GraphEngine import GraphEngine
+from GraphEngine.KnowledgeGraph import Node, Edge, Triple, Identifier
+from GraphEngine.Structures import Page, EstablishedLink
+
+
+
+def traced_bytes(create, nr_of_entities):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = create(nr_of_entities)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entities
+    return (after - before) / nr_of_entities
+
+class BaselineIdentifier:
+    def __init__(self):
+        self._id = Identifier.next_id()
+
+class BaselineNode:
+    def __init__(self, name):
+        self._identifier = BaselineIdentifier()
+        self._name = name
+        self._edges = {}
+        self._out_edges = {}
+        self._in_edges = {}
+        self._classes = {}
+        self._properties = {}
+
+    def add_edge(self, edge):
+        self._edges[edge._id._id] = edge
+        adjacency, neighbor = (self._out_edges, edge._to_node) if edge._from_node is self else (self._in_edges, edge._from_node)
+        if neighbor._identifier._id not in adjacency:
+            adjacency[neighbor._identifier._id] = {}
+        adjacency[neighbor._identifier._id][edge._id._id] = edge
+
+class BaselineEdge:
+    def __init__(self, from_node, to_node, label):
+        self._id = BaselineIdentifier()
+        self._from_node = from_node
+        self._to_node = to_node
+        self._types = {}
+        self._properties = {}
+        self._label = label
+        from_node.add_edge(self)
+        to_node.add_edge(self)
+
+class BaselineTriple:
+    def __init__(self, object, subject, predicate):
+        self._object = object
+        self._subject = subject
+        self._predicate = predicate
+
+class BaselineEstablishedLink:
+    def __init__(self, from_page, link):
+        self._id = BaselineIdentifier()
+        self._link = link
+        self._from_page = from_page
+
+BASELINE = {"Node": BaselineNode, "Edge": BaselineEdge, "Triple": BaselineTriple, "EstablishedLink": BaselineEstablishedLink}
+SLOTTED = {"Node": Node, "Edge": Edge, "Triple": Triple, "EstablishedLink": EstablishedLink}
+
+
+
+def create_nodes(classes):
+    def create(nr_of_nodes):
+        return [classes["Node"](str(count)) for count in range(0, nr_of_nodes)]
+    return create
+
+def create_edges_between(classes, nodes):
+    def create_edges(nr_of_edges):
+        return [classes["Edge"](nodes[count % len(nodes)], nodes[(count + 1 + count // len(nodes)) % len(nodes)], "Is") for count in range(0, nr_of_edges)]
+    return create_edges
+
+def create_triples_on(classes, edges):
+    def create_triples(nr_of_triples):
+        return [classes["Triple"](edges[count]._from_node, edges[count]._to_node, edges[count]) for count in range(0, nr_of_triples)]
+    return create_triples
+
+def create_links_between(classes, pages):
+    def create_links(nr_of_links):
+        return [classes["EstablishedLink"](pages[count % len(pages)], pages[(count + 1) % len(pages)].link) for count in range(0, nr_of_links)]
+    return create_links
+
+def entity_bytes(classes, nr_of_entities, edges_per_node):
+    #Bytes per entity. An edge includes its adjacency entries in both nodes
+    node_bytes = traced_bytes(create_nodes(classes), nr_of_entities)
+    nodes = create_nodes(classes)(nr_of_entities)
+    edge_bytes = traced_bytes(create_edges_between(classes, nodes), nr_of_entities * edges_per_node)
+    edges = create_edges_between(classes, nodes)(nr_of_entities)
+    triple_bytes = traced_bytes(create_triples_on(classes, edges), nr_of_entities)
+    pages = [Page() for _ in range(0, 100)]
+    link_bytes = traced_bytes(create_links_between(classes, pages), nr_of_entities)
+    return {"Node": node_bytes, "Edge": edge_bytes, "Triple": triple_bytes, "EstablishedLink": link_bytes}
+
+def count_entities():
+    #Live entities of each kind, which are the ones of the generated network
+    counts = {"Node": 0, "Edge": 0, "Triple": 0, "EstablishedLink": 0}
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in counts:
+            counts[name] += 1
+    return counts
+
+def generated_network(CONFIG):
+    gc.collect()
+    tracemalloc.start()
+    _, network = GraphEngine.generate(CONFIG)
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return network, total
+
+
+
+if __name__ == "__main__":
+    CONFIG = load_config(sys.argv[1] if len(sys.argv) > 1 else "../Data/ConfigFiles/CONFIG_GE.yaml")
+    network, total = generated_network(CONFIG)
+    counts = count_entities()
+    edges_per_node = max(1, round(counts["Edge"] / max(1, counts["Node"])))
+    nr_of_entities = 20000
+
+    baseline_bytes = entity_bytes(BASELINE, nr_of_entities, edges_per_node)
+    slotted_bytes = entity_bytes(SLOTTED, nr_of_entities, edges_per_node)
+    saved = sum(counts[name] * (baseline_bytes[name] - slotted_bytes[name]) for name in counts)
+
+    print(f"Generated network: {total/1024**2:.2f} MiB traced, " + ", ".join(f"{counts[name]} {name}s" for name in counts))
+    print(f"Edges include the adjacency entries in both nodes, {edges_per_node} edges per node")
+    print(f"{'':17}{'baseline':>10}{'slots':>10}{'saved':>8}")
+    for name in counts:
+        print(f"{name + ':':17}{baseline_bytes[name]:8.1f} B{slotted_bytes[name]:8.1f} B{1 - slotted_bytes[name] / baseline_bytes[name]:8.0%}")
+    print(f"Saved on the generated network: {saved/1024**2:.2f} MiB of {(total + saved)/1024**2:.2f} MiB")
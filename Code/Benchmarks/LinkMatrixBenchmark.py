@@ -0,0 +1,43 @@
+#Link matrix benchmark
+#Compares in-degree counting by walking the EstablishedLink objects against the CSR link matrices
+#Run from the Code folder: python -m Benchmarks.LinkMatrixBenchmark [config file]
+
+import sys
+import time
+
+from HelpFiles.FileModules import load_config
+from GraphEngine.GraphEngine import GraphEngine
+
+
+
+def object_in_degrees(network):
+    in_degrees = {page.id: 0 for page in network.pages}
+    for website in network.websites:
+        for page in website.pages:
+            for link in page.internal_links + page.external_links:
+                in_degrees[link.to_page.id] += 1
+    return in_degrees
+
+def matrix_in_degrees(network):
+    link_matrix = network.page_link_matrix()
+    return dict(zip(link_matrix.ids.tolist(), link_matrix.in_degrees().tolist()))
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+
+if __name__ == "__main__":
+    CONFIG = load_config(sys.argv[1] if len(sys.argv) > 1 else "../Data/ConfigFiles/CONFIG_GE.yaml")
+    _, network = GraphEngine.generate(CONFIG)
+    object_result, object_time = timed(object_in_degrees, network)
+    matrix_result, matrix_time = timed(matrix_in_degrees, network)
+    website_matrix, website_time = timed(network.website_link_matrix)
+    if object_result != matrix_result:
+        raise Exception("The link matrix does not agree with the links")
+    print(f"Pages: {network.nr_of_pages}, links: {sum(object_result.values())}")
+    print(f"Object walk:         {object_time*1000:8.2f} ms")
+    print(f"Page link matrix:    {matrix_time*1000:8.2f} ms")
+    print(f"Website link matrix: {website_time*1000:8.2f} ms  ({website_matrix.nr_of_unique_links} website pairs)")
@@ -0,0 +1,72 @@
+#Page graph benchmark
+#Compares Page.graph returning a read-only view against the old behaviour of copying the knowledge graph on every access
+#Run from the Code folder: python -m Benchmarks.PageGraphBenchmark [config file]
+
+import sys
+import time
+import tracemalloc
+
+from HelpFiles.FileModules import load_config
+from GraphEngine.GraphEngine import GraphEngine
+from GraphEngine.KnowledgeGraph import Graph
+from GraphEngine.Structures import Page
+
+
+
+class GraphCounter:
+    constructed = 0
+
+    def count(init):
+        def counted_init(self, *args, **kwargs):
+            GraphCounter.constructed += 1
+            init(self, *args, **kwargs)
+        return counted_init
+
+
+
+def copied_graph(page):
+    return Graph(page._knowledge_graph.get_nodes(), page._knowledge_graph.get_edges())
+
+def use_copied_graphs():
+    Page.graph = property(copied_graph)
+    Page.nodes = property(lambda page: page.graph.get_nodes())
+    Page.edges = property(lambda page: page.graph.get_edges())
+    Page.get_node = lambda page, node_id: page.graph.get_node(node_id)
+    Page.get_edges_between = lambda page, node_id_A, node_id_B = None: page.graph.get_edges_between(node_id_A, node_id_B)
+
+def run(CONFIG, trace_memory):
+    GraphCounter.constructed = 0
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    _, network = GraphEngine.generate(CONFIG)
+    page_accesses(network)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    if trace_memory:
+        tracemalloc.stop()
+    return {"Time": elapsed, "Peak": peak, "Graphs": GraphCounter.constructed, "Pages": len(network.pages)}
+
+def page_accesses(network):
+    #Access pattern of the visualizers and the evaluation
+    for page in network.pages:
+        for node in page.nodes:
+            page.get_node(node.id)
+        for edge in page.edges:
+            page.get_edges_between(edge)
+
+def print_result(name, result):
+    print(f"{name:>8}: {result['Time']:8.3f} s  peak {result['Peak']/1024**2:8.2f} MiB  graphs constructed {result['Graphs']:>9}  pages {result['Pages']}")
+
+
+
+if __name__ == "__main__":
+    CONFIG = load_config(sys.argv[1] if len(sys.argv) > 1 else "../Data/ConfigFiles/CONFIG_GE.yaml")
+    Graph.__init__ = GraphCounter.count(Graph.__init__)
+    view_time = run(CONFIG, trace_memory = False)
+    view_memory = run(CONFIG, trace_memory = True)
+    use_copied_graphs()
+    copy_time = run(CONFIG, trace_memory = False)
+    copy_memory = run(CONFIG, trace_memory = True)
+    print_result("View", view_time | {"Peak": view_memory["Peak"]})
+    print_result("Copy", copy_time | {"Peak": copy_memory["Peak"]})
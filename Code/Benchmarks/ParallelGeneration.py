@@ -0,0 +1,57 @@
+#Parallel generation benchmark
+#Times the website stage of the network generation for different numbers of workers, and checks that they give the same websites
+#0 workers is the serial loop of GraphEngine. The ids of websites, pages and links differ between serial and parallel generation,
+#so websites are compared by page positions, edges and topics. Use many pages (pages=) to check that pages made while describing
+#a website do not mix with the real pages
+#Run from the Code folder: python -m Benchmarks.ParallelGeneration [nr of workers ...] [atoms=nr of atoms] [pages=average pages] [config file]
+
+import sys
+import os
+import time
+
+from HelpFiles.FileModules import load_config
+from GraphEngine.GraphEngine import GraphEngine
+from GraphEngine.NetworkGenerator import NetworkGenerator
+from GraphEngine.Structures import Network
+from GraphEngine.KnowledgeGraph import IdScope
+from GraphEngine.RandomStream import RandomStream
+
+
+
+def website_summary(knowledge_tree, network):
+    positions = {page.id: (website_index, page_index) for website_index, website in enumerate(network.websites) for page_index, page in enumerate(website.pages)}
+    return [(positions[website.front_page.id], [(sorted([edge.id for edge in page.edges]), [topic.id for topic in knowledge_tree.get_page_topics(page)], sorted([positions[link.to_page.id] for link in page.internal_links])) for page in website.pages]) for website in network.websites]
+
+def run(CONFIG, nr_of_workers):
+    rng = RandomStream(CONFIG["Seed"])
+    with IdScope():
+        knowledge_tree = GraphEngine._generate_knowledge(CONFIG, rng)
+        network = Network()
+        start = time.perf_counter()
+        if nr_of_workers > 0:
+            NetworkGenerator.generate_websites_in_parallel(CONFIG, knowledge_tree, network, nr_of_workers, rng.child("Websites"))
+        while NetworkGenerator.is_knowledge_satisfied(CONFIG, knowledge_tree, network) == False:
+            network.add_websites(NetworkGenerator.generate_websites(CONFIG, knowledge_tree, network, rng.child("Websites")))
+        elapsed = time.perf_counter() - start
+    return website_summary(knowledge_tree, network), elapsed
+
+
+
+if __name__ == "__main__":
+    worker_counts = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    worker_counts = worker_counts if len(worker_counts) > 0 else [0, 1, 2, 4, 8, 16, 32]
+    config_addrs = [arg for arg in sys.argv[1:] if arg.endswith(".yaml")]
+    CONFIG = load_config(config_addrs[0] if len(config_addrs) > 0 else "../Data/ConfigFiles/CONFIG_GE.yaml")
+    for arg in sys.argv[1:]:
+        if arg.startswith("atoms="):
+            CONFIG["Knowledge"]["Shape"]["Atoms"] = int(arg.split("=")[1])
+        if arg.startswith("pages="):
+            CONFIG["Network"]["Websites"]["Pages"]["Average"] = int(arg.split("=")[1])
+    print(f"CPUs: {os.cpu_count()}")
+    baseline, baseline_time = None, None
+    for nr_of_workers in worker_counts:
+        summary, elapsed = run(CONFIG, nr_of_workers)
+        baseline, baseline_time = (summary, elapsed) if baseline == None else (baseline, baseline_time)
+        if summary != baseline:
+            raise Exception(f"{nr_of_workers} workers gave other websites than {worker_counts[0]}")
+        print(f"{nr_of_workers:>3} workers: {elapsed:8.2f} s  speedup {baseline_time/elapsed:5.2f}  websites {len(summary)}")
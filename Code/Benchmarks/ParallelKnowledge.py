@@ -0,0 +1,51 @@
+#Parallel knowledge benchmark
+#Times the atom knowledge and sub layer stages of the knowledge generation for different numbers of workers, and checks that they give the same knowledge tree
+#Run from the Code folder: python -m Benchmarks.ParallelKnowledge [nr of workers ...] [atoms=nr of atoms] [width=nr of topics] [config file]
+
+import sys
+import os
+import time
+
+from HelpFiles.FileModules import load_config
+from GraphEngine.KnowledgeGenerator import KnowledgeGenerator, UniquePredicate
+from GraphEngine.KnowledgeTreeStructures import KnowledgeTree
+from GraphEngine.KnowledgeGraph import IdScope
+from GraphEngine.RandomStream import RandomStream
+
+
+
+def tree_summary(knowledge_tree):
+    return [(element.id, [parent.id for parent in element.parents], [child.id for child in element.children], [(triple.object.id, triple.subject.id, triple.predicate.id, triple.predicate.label) for triple in element.get_own_triples()]) for element in knowledge_tree.nodes]
+
+def run(CONFIG, nr_of_workers):
+    rng = RandomStream(CONFIG["Seed"])
+    UniquePredicate.unique_counter = 0
+    with IdScope():
+        knowledge_tree = KnowledgeTree()
+        KnowledgeGenerator.generate_topics_and_atoms(CONFIG, knowledge_tree, rng.child("Topics"))
+        start = time.perf_counter()
+        KnowledgeGenerator.generate_atom_knowledge_in_parallel(CONFIG, knowledge_tree, nr_of_workers, rng.child("Atoms"))
+        KnowledgeGenerator.generate_sub_layers_in_parallel(CONFIG, knowledge_tree, nr_of_workers, rng.child("SubLayers"))
+        elapsed = time.perf_counter() - start
+    return tree_summary(knowledge_tree), elapsed
+
+
+
+if __name__ == "__main__":
+    worker_counts = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    worker_counts = worker_counts if len(worker_counts) > 0 else [1, 2, 4, 8, 16, 32]
+    config_addrs = [arg for arg in sys.argv[1:] if arg.endswith(".yaml")]
+    CONFIG = load_config(config_addrs[0] if len(config_addrs) > 0 else "../Data/ConfigFiles/CONFIG_GE.yaml")
+    for arg in sys.argv[1:]:
+        if arg.startswith("atoms="):
+            CONFIG["Knowledge"]["Shape"]["Atoms"] = int(arg.split("=")[1])
+        if arg.startswith("width="):
+            CONFIG["Knowledge"]["Shape"]["Width"] = int(arg.split("=")[1])
+    print(f"CPUs: {os.cpu_count()}")
+    baseline, baseline_time = None, None
+    for nr_of_workers in worker_counts:
+        summary, elapsed = run(CONFIG, nr_of_workers)
+        baseline, baseline_time = (summary, elapsed) if baseline == None else (baseline, baseline_time)
+        if summary != baseline:
+            raise Exception(f"{nr_of_workers} workers gave another knowledge tree than {worker_counts[0]}")
+        print(f"{nr_of_workers:>3} workers: {elapsed:8.2f} s  speedup {baseline_time/elapsed:5.2f}  elements {len(summary)}")
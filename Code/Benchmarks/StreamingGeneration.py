@@ -0,0 +1,63 @@
+#Streaming generation benchmark
+#Compares the peak memory of GraphEngine.generate against GraphEngine.generate_stream, and checks that both give the same websites
+#Run from the Code folder: python -m Benchmarks.StreamingGeneration [config file] [nr of atoms]
+#Each mode is measured in its own process, since the first generation in a process also pays for one-time caches
+
+import sys
+import subprocess
+import time
+import tempfile
+import tracemalloc
+
+from HelpFiles.FileModules import load_config
+from GraphEngine.GraphEngine import GraphEngine
+
+
+
+def website_summary(website):
+    pages = [(page.id, sorted([edge.id for edge in page.edges]), sorted([link.id for link in page.internal_links]), sorted([link.id for link in page.external_links])) for page in website.pages]
+    return (website.id, website.front_page.id, pages)
+
+def run_generate(CONFIG):
+    _, network = GraphEngine.generate(CONFIG)
+    return [website_summary(website) for website in network.websites]
+
+def run_stream(CONFIG, folder_addr):
+    return [website_summary(website) for website in GraphEngine.generate_stream(CONFIG, folder_addr)]
+
+def measure(run, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def print_result(name, nr_of_websites, elapsed, peak):
+    print(f"{name:>8}: {elapsed:8.2f} s  peak {peak/1024**2:8.2f} MiB  websites {nr_of_websites}")
+
+
+
+def measure_mode(CONFIG, mode):
+    with tempfile.TemporaryDirectory() as folder:
+        result, elapsed, peak = measure(run_stream, CONFIG, folder + "/") if mode == "stream" else measure(run_generate, CONFIG)
+    print_result(mode.capitalize(), len(result), elapsed, peak)
+    return result
+
+
+
+if __name__ == "__main__":
+    config_addr = sys.argv[1] if len(sys.argv) > 1 else "../Data/ConfigFiles/CONFIG_GE.yaml"
+    nr_of_atoms = sys.argv[2] if len(sys.argv) > 2 else None
+    CONFIG = load_config(config_addr)
+    if nr_of_atoms != None:
+        CONFIG["Knowledge"]["Shape"]["Atoms"] = int(nr_of_atoms)
+    if len(sys.argv) > 3:
+        measure_mode(CONFIG, sys.argv[3])
+    else:
+        for mode in ["generate", "stream"]:
+            subprocess.run([sys.executable, "-m", "Benchmarks.StreamingGeneration", config_addr, str(CONFIG["Knowledge"]["Shape"]["Atoms"]), mode], check=True)
+        with tempfile.TemporaryDirectory() as folder:
+            if run_stream(CONFIG, folder + "/") != run_generate(CONFIG):
+                raise Exception("The streamed websites differ from the generated websites")
@@ -0,0 +1,189 @@
+from __future__ import annotations
+import numpy
+from bisect import bisect_left, bisect_right
+
+from GraphEngine.KnowledgeGraph import *
+
+
+
+
+class ArrayGraph:
+    #Graph stored in numpy arrays instead of Node and Edge objects. Read-only after construction
+    #Nodes are referenced by their position in the sorted node id array, edges by their position in the sorted edge id array
+    #Out and in adjacency are kept in CSR form: the edges of node i are edge_order[indptr[i]:indptr[i+1]], sorted on the other end
+    def __init__(self, node_ids = None, from_ids = None, to_ids = None, labels = None, edge_ids = None, label_ids = None):
+        #Labels are given as values or as ids from TermDictionary.shared
+        from_ids = numpy.asarray([] if from_ids is None else from_ids, dtype=numpy.int64)
+        to_ids = numpy.asarray([] if to_ids is None else to_ids, dtype=numpy.int64)
+        if label_ids is None:
+            label_ids = self._intern_labels([] if labels is None else labels)
+        label_ids = numpy.asarray(label_ids, dtype=numpy.int32)
+        if len(from_ids) != len(to_ids) or len(from_ids) != len(label_ids):
+            raise Exception("Every edge must have a from node, a to node and a label")
+        if numpy.any(from_ids == to_ids):
+            raise Exception("A node cannot point to itself")
+        edge_ids = numpy.arange(len(from_ids), dtype=numpy.int64) if edge_ids is None else numpy.asarray(edge_ids, dtype=numpy.int64)
+        node_ids = numpy.concatenate((from_ids, to_ids)) if node_ids is None else numpy.concatenate((numpy.asarray(node_ids, dtype=numpy.int64), from_ids, to_ids))
+
+        self._node_ids = self._read_only(numpy.unique(node_ids))
+
+        edge_order = numpy.argsort(edge_ids, kind="stable")
+        self._edge_ids = self._read_only(edge_ids[edge_order])
+        if len(self._edge_ids) > 1 and numpy.any(self._edge_ids[1:] == self._edge_ids[:-1]):
+            raise Exception("Edge ids must be unique")
+        self._from = self._read_only(numpy.searchsorted(self._node_ids, from_ids[edge_order]).astype(numpy.int32))
+        self._to = self._read_only(numpy.searchsorted(self._node_ids, to_ids[edge_order]).astype(numpy.int32))
+        self._label_ids = self._read_only(label_ids[edge_order])
+
+        self._out_indptr, self._out_edges = self._build_csr(self._from, self._to)
+        self._out_to = self._read_only(self._to[self._out_edges])     #The to node of every out edge in CSR order, sorted within each row
+        self._in_indptr, self._in_edges = self._build_csr(self._to, self._from)
+
+    def from_graph(graph : Graph) -> ArrayGraph:
+        edges = graph.get_edges()
+        from_ids = numpy.fromiter((edge.from_node.id for edge in edges), dtype=numpy.int64, count=len(edges))
+        to_ids = numpy.fromiter((edge.to_node.id for edge in edges), dtype=numpy.int64, count=len(edges))
+        edge_ids = numpy.fromiter((edge.id for edge in edges), dtype=numpy.int64, count=len(edges))
+        label_ids = numpy.fromiter((edge.label_id for edge in edges), dtype=numpy.int32, count=len(edges))
+        return ArrayGraph(graph.get_node_ids(), from_ids, to_ids, None, edge_ids, label_ids)
+
+    def from_triples(triples : list[Triple]) -> ArrayGraph:
+        from_ids = [triple.object.id for triple in triples]
+        to_ids = [triple.subject.id for triple in triples]
+        label_ids = [triple.predicate.label_id for triple in triples]
+        edge_ids = [triple.predicate.id for triple in triples]
+        return ArrayGraph(None, from_ids, to_ids, None, edge_ids, label_ids)
+
+    def _read_only(self, array):
+        array.flags.writeable = False
+        return array
+
+    def _intern_labels(self, labels):
+        return numpy.fromiter((TermDictionary.shared.intern(label) for label in labels), dtype=numpy.int32, count=len(labels))
+
+    def _build_csr(self, row_nodes, column_nodes):
+        edge_order = numpy.lexsort((column_nodes, row_nodes)).astype(numpy.int64)
+        indptr = numpy.zeros(len(self._node_ids)+1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(row_nodes, minlength=len(self._node_ids)), out=indptr[1:])
+        return self._read_only(indptr), self._read_only(edge_order)
+
+    def __eq__(self, graph : ArrayGraph) -> bool:
+        if not isinstance(graph, ArrayGraph):
+            return False
+        return numpy.array_equal(self._node_ids, graph._node_ids) and numpy.array_equal(self._edge_ids, graph._edge_ids)
+
+    @property
+    def nodes(self) -> numpy.ndarray:
+        return self.get_nodes()
+
+    @property
+    def edges(self) -> numpy.ndarray:
+        return self.get_edges()
+
+    @property
+    def nr_of_nodes(self) -> int:
+        return len(self._node_ids)
+
+    @property
+    def nr_of_edges(self) -> int:
+        return len(self._edge_ids)
+
+    @property
+    def labels(self) -> list:
+        return [TermDictionary.shared.term(label_id) for label_id in numpy.unique(self._label_ids).tolist()]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self._node_ids, self._edge_ids, self._from, self._to, self._label_ids, self._out_indptr, self._out_edges, self._out_to, self._in_indptr, self._in_edges]
+        return sum([array.nbytes for array in arrays])
+
+    @property
+    def triples(self) -> list[Tuple[int, int, object]]:
+        from_ids, to_ids, label_ids = self.triple_arrays()
+        return [(from_id, to_id, TermDictionary.shared.term(label_id)) for from_id, to_id, label_id in zip(from_ids.tolist(), to_ids.tolist(), label_ids.tolist())]
+
+    def triple_arrays(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        #(from node ids, to node ids, label ids) with one entry per edge in edge id order
+        return self._node_ids[self._from], self._node_ids[self._to], self._label_ids
+
+    def subset_of(self, graph : Union[ArrayGraph, Graph]) -> bool:
+        if isinstance(graph, ArrayGraph):
+            node_ids, edge_ids = graph._node_ids, graph._edge_ids
+        else:
+            node_ids = numpy.fromiter(graph.get_node_ids(), dtype=numpy.int64)
+            edge_ids = numpy.fromiter((edge.id for edge in graph.get_edges()), dtype=numpy.int64)
+        return bool(numpy.all(numpy.isin(self._node_ids, node_ids)) and numpy.all(numpy.isin(self._edge_ids, edge_ids)))
+
+    def node_exist(self, node : Union[Node, int]) -> bool:
+        return self._node_index(node) != None
+
+    def edge_exist(self, edge : Union[Edge, int]) -> bool:
+        edge_id = edge.id if isinstance(edge, Edge) else edge
+        position = numpy.searchsorted(self._edge_ids, edge_id)
+        return position < len(self._edge_ids) and self._edge_ids[position] == edge_id
+
+    def _node_index(self, node : Union[Node, int]):
+        node_id = node.id if isinstance(node, Node) else node
+        position = numpy.searchsorted(self._node_ids, node_id)
+        if position < len(self._node_ids) and self._node_ids[position] == node_id:
+            return int(position)
+        return None
+
+    def _get_node_index(self, node : Union[Node, int]) -> int:
+        node_index = self._node_index(node)
+        if node_index == None:
+            raise Exception(f"Node {node} does not exist in the graph")
+        return node_index
+
+    def get_nodes(self) -> numpy.ndarray:
+        return self._node_ids
+
+    def get_edges(self) -> numpy.ndarray:
+        return self._edge_ids
+
+    def get_node_ids(self) -> numpy.ndarray:
+        return self._node_ids
+
+    def get_edge_node_ids(self) -> numpy.ndarray:
+        return numpy.stack((self._node_ids[self._from], self._node_ids[self._to]), axis=1)
+
+    def get_label(self, edge : Union[Edge, int]):
+        edge_id = edge.id if isinstance(edge, Edge) else edge
+        return TermDictionary.shared.term(int(self._label_ids[numpy.searchsorted(self._edge_ids, edge_id)]))
+
+    def get_edges_with_label(self, label) -> numpy.ndarray:
+        label_id = TermDictionary.shared.term_id(label)
+        if label_id == None:
+            return self._edge_ids[:0]
+        return self._edge_ids[self._label_ids == label_id]
+
+    def get_out_edges(self, node : Union[Node, int]) -> numpy.ndarray:
+        node_index = self._get_node_index(node)
+        return self._edge_ids[self._out_edges[self._out_indptr[node_index]:self._out_indptr[node_index+1]]]
+
+    def get_in_edges(self, node : Union[Node, int]) -> numpy.ndarray:
+        node_index = self._get_node_index(node)
+        return self._edge_ids[self._in_edges[self._in_indptr[node_index]:self._in_indptr[node_index+1]]]
+
+    def get_edges_between(self, node_a, node_b = None) -> numpy.ndarray:
+        #Edge ids in both directions, like Graph.get_edges_between
+        if isinstance(node_a, Edge):
+            node_b = node_a.to_node
+            node_a = node_a.from_node
+        index_a = self._get_node_index(node_a)
+        index_b = self._get_node_index(node_b)
+        edges_ab = self._out_edge_positions(index_a, index_b)
+        edges_ba = self._out_edge_positions(index_b, index_a)
+        if len(edges_ba) == 0:
+            return self._edge_ids[edges_ab]
+        return self._edge_ids[numpy.sort(numpy.concatenate((edges_ab, edges_ba)))]
+
+    def _out_edge_positions(self, from_index, to_index):
+        #The out row is sorted on the to node, so the edges to to_index are one slice of it. bisect searches the row in place,
+        #numpy.searchsorted would cost more than the whole lookup on the short rows most nodes have
+        start, stop = int(self._out_indptr[from_index]), int(self._out_indptr[from_index+1])
+        first = bisect_left(self._out_to, to_index, start, stop)
+        return self._out_edges[first:bisect_right(self._out_to, to_index, first, stop)]
+
+    def print_info(self):
+        print(f"Nodes: {self.nr_of_nodes}, Edges: {self.nr_of_edges}, Labels: {len(self.labels)}, Bytes: {self.nbytes}")
@@ -0,0 +1,107 @@
+from __future__ import annotations
+import numpy
+
+from GraphEngine.KnowledgeTreeStructures import *
+from GraphEngine.Structures import *
+
+
+
+
+class ExternalLinkIndex:
+    #Arrays NetworkGenerator.generate_website_external_links looks candidates up in, built once after all websites are made
+    #Pages and websites are referenced by their position in the skeleton. For every topic the positions of its pages are
+    #kept in increasing order, which is the order the pages were connected to the topic, so candidates come out in the
+    #same order as from knowledge_tree.get_topic_pages
+    def __init__(self, knowledge_tree : KnowledgeTree, skeleton : NetworkSkeleton, pages : List[Page] = None):
+        #pages are the pages at the skeleton's positions, links are made to them. Without pages, links are made to
+        #spilled stand-ins of the target pages, see NetworkSkeleton.page
+        self._skeleton = skeleton
+        self._pages = pages
+        self._website_index = {website_id: index for index, website_id in enumerate(skeleton.website_ids)}
+        self._page_website = skeleton.page_websites()
+        topic_ids, topic_indptr = skeleton.page_topic_ids()
+        self._page_nr_of_topics = numpy.diff(topic_indptr)
+        self._topic_layers = {}
+        #The (topic, page) pairs sorted on the topic. The sort is stable, so the pages of a topic stay in increasing order
+        order = numpy.argsort(topic_ids, kind="stable")
+        sorted_topic_ids = topic_ids[order]
+        sorted_pages = numpy.repeat(numpy.arange(skeleton.nr_of_pages, dtype=numpy.int64), self._page_nr_of_topics)[order]
+        starts = numpy.flatnonzero(numpy.diff(sorted_topic_ids, prepend=-1))
+        stops = numpy.append(starts[1:], len(sorted_topic_ids))
+        topics = [knowledge_tree.get_node(topic_id) for topic_id in sorted_topic_ids[starts].tolist()]
+        self._topic_pages = {topic.id: sorted_pages[start:stop] for topic, start, stop in zip(topics, starts.tolist(), stops.tolist())}
+        topic_layers = numpy.array([self.topic_layer(knowledge_tree, topic) for topic in topics], dtype=numpy.int64)
+        self._page_layer_sum = numpy.zeros(skeleton.nr_of_pages, dtype=numpy.int64)
+        numpy.add.at(self._page_layer_sum, sorted_pages, numpy.repeat(topic_layers, stops - starts))
+        #Websites that link to each website, as website positions
+        self._linking_websites = [[] for _ in range(skeleton.nr_of_websites)]
+
+    def from_network(knowledge_tree : KnowledgeTree, network : Network) -> ExternalLinkIndex:
+        #The index of a network in memory. Links are made to its pages, and its external links count as linking websites
+        websites = network.websites
+        skeleton = NetworkSkeleton()
+        for website in websites:
+            skeleton.add_website(knowledge_tree, website)
+        pages = [page for website in websites for page in website.pages]
+        link_index = ExternalLinkIndex(knowledge_tree, skeleton, pages)
+        page_index = {page.id: index for index, page in enumerate(pages)}
+        for from_index, website in enumerate(websites):
+            for link in website.external_links:
+                if link.to_page.id in page_index:
+                    link_index._linking_websites[link_index._page_website[page_index[link.to_page.id]]] += [from_index]
+        return link_index
+
+    @property
+    def nr_of_websites(self) -> int:
+        return len(self._linking_websites)
+
+    def website_index(self, website : Website) -> int:
+        return self._website_index[website.id]
+
+    def website_pages(self, website_index : int) -> range:
+        return self._skeleton.website_pages(website_index)
+
+    def page(self, page_index : int) -> Page:
+        return self._pages[page_index] if self._pages != None else self._skeleton.page(page_index)
+
+    def page_topics(self, knowledge_tree : KnowledgeTree, page_index : int) -> List[Topic]:
+        #The topics of the page when the index was built, like knowledge_tree.get_page_topics
+        return [knowledge_tree.get_node(topic_id) for topic_id in self._skeleton.topic_ids_of_page(page_index)]
+
+    def topic_layer(self, knowledge_tree : KnowledgeTree, topic : Topic) -> int:
+        if topic.id not in self._topic_layers:
+            self._topic_layers[topic.id] = knowledge_tree.get_layer(topic)
+        return self._topic_layers[topic.id]
+
+    def linked_websites(self, website_index : int) -> numpy.ndarray:
+        #Bitmap over the websites, True where the website already links to website_index. Links made by website_index
+        #itself do not change it, so it holds while the links of website_index are made
+        bitmap = numpy.zeros(self.nr_of_websites, dtype=bool)
+        bitmap[self._linking_websites[website_index]] = True
+        return bitmap
+
+    def nr_of_topic_pages_on_website(self, topic : Topic, website_index : int) -> int:
+        if topic.id not in self._topic_pages:
+            return 0
+        return int(numpy.count_nonzero(self._page_website[self._topic_pages[topic.id]] == website_index))
+
+    def candidate_pages(self, topic_child : Topic, topic_parent : Topic, website_index : int, linked_websites : numpy.ndarray) -> numpy.ndarray:
+        #Pages of topic_child that are also pages of topic_parent, on another website that does not link to website_index yet
+        if topic_child.id not in self._topic_pages or topic_parent.id not in self._topic_pages:
+            return numpy.zeros(0, dtype=numpy.int64)
+        page_indexes = self._topic_pages[topic_child.id]
+        page_websites = self._page_website[page_indexes]
+        page_indexes = page_indexes[(page_websites != website_index) & (linked_websites[page_websites] == False)]
+        parent_pages = self._topic_pages[topic_parent.id]
+        positions = numpy.minimum(numpy.searchsorted(parent_pages, page_indexes), len(parent_pages)-1)
+        return page_indexes[parent_pages[positions] == page_indexes]
+
+    def page_scores(self, page_indexes : numpy.ndarray, parent_layer : int) -> numpy.ndarray:
+        #(parent_layer + sum of parent_layer - topic layer over the page's topics) / nr of topics, for every page
+        nr_of_topics = self._page_nr_of_topics[page_indexes]
+        return (parent_layer + (nr_of_topics * parent_layer - self._page_layer_sum[page_indexes])) / nr_of_topics
+
+    def add_external_link(self, website : Website, page : Page, page_index : int) -> EstablishedLink:
+        link = page.add_external_link(self.page(page_index).link)     #candidate_pages leaves out the pages of the website itself
+        self._linking_websites[self._page_website[page_index]] += [self._website_index[website.id]]
+        return link
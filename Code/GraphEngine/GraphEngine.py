@@ -1,5 +1,3 @@
-import numpy
-import random 
 import time
 
 from GraphEngine.Structures import *
@@ -8,40 +6,87 @@ from GraphEngine.KnowledgeGenerator import KnowledgeGenerator
 from GraphEngine.NetworkGenerator import NetworkGenerator
 from GraphEngine.KnowledgeTreeStructures import *
 from GraphEngine.Visualization import Visualize
+from GraphEngine.RandomStream import RandomStream
+from GraphEngine.ExternalLinkIndex import ExternalLinkIndex
 from GraphEngine.Structures import Page
+from HelpFiles.FileModules import save_website, save_external_links, save_network, load_website, triples_by_edge_id
 
 
 
 
 class GraphEngine:        
 
-    def generate(CONFIG):
-        random.seed(CONFIG["Seed"])
-        numpy.random.seed(CONFIG["Seed"])
-        knowledge_tree = GraphEngine._generate_knowledge(CONFIG)
-        network = GraphEngine._generate_network(CONFIG, knowledge_tree)
-        GraphEngine._obstruct_knowledge(CONFIG, knowledge_tree, network)
+    def generate(CONFIG, id_allocator : IdAllocator = None):
+        #Ids are taken from id_allocator, or counted from 0 for every generation, so the same seed gives the same ids
+        #Every stage draws from its own child of the seed's RandomStream, the global random states are not used
+        rng = RandomStream(CONFIG["Seed"])
+        with IdScope(id_allocator):
+            knowledge_tree = GraphEngine._generate_knowledge(CONFIG, rng)
+            network = GraphEngine._generate_network(CONFIG, knowledge_tree, rng)
+            GraphEngine._obstruct_knowledge(CONFIG, knowledge_tree, network, rng)
         return knowledge_tree, network
 
-    def _generate_knowledge(CONFIG):
+    def generate_stream(CONFIG, folder_addr, id_allocator : IdAllocator = None):
+        #Same simulation as generate, but every website is written to folder_addr as soon as it is made and then dropped.
+        #The websites are yielded one by one, with their external links, which are written to folder_addr first.
+        #Use: knowledge_tree, skeleton = yield from GraphEngine.generate_stream(...)
+        #Memory: the knowledge tree and one batch of websites, plus the NetworkSkeleton and ExternalLinkIndex. Those are
+        #O(pages), but only flat arrays of ids, fingerprints and topic ids instead of Page, Website and link objects
+        #The external link targets of a yielded website are spilled stand-ins, see Page.spilled. The pages are not left
+        #connected to the knowledge tree
+        #HelpFiles.FileModules.load_network reads the full network from folder_addr
+        rng = RandomStream(CONFIG["Seed"])
+        id_scope = IdScope(id_allocator)
+        with id_scope:
+            knowledge_tree = GraphEngine._generate_knowledge(CONFIG, rng)
+            skeleton = NetworkSkeleton()
+            while NetworkGenerator.is_knowledge_satisfied(CONFIG, knowledge_tree, skeleton) == False:
+                for website in NetworkGenerator.generate_websites(CONFIG, knowledge_tree, skeleton, rng.child("Websites")):
+                    skeleton.add_website(knowledge_tree, website)
+                    save_website(website, folder_addr)
+                    for page in website.pages:
+                        knowledge_tree.disconnect_page(page)
+            triples = triples_by_edge_id(knowledge_tree)
+            save_network(skeleton, folder_addr, save_websites = False)
+        external_link_rng = rng.child("ExternalLinks")
+        link_index = ExternalLinkIndex(knowledge_tree, skeleton)
+        for website_index, website_id in enumerate(skeleton.website_ids):
+            website = load_website(folder_addr, website_id, triples)
+            with id_scope:
+                NetworkGenerator.generate_website_external_links(CONFIG, knowledge_tree, website, link_index, external_link_rng.child(website_index))
+                save_external_links(website, folder_addr)
+            yield website
+        with id_scope:
+            GraphEngine._obstruct_knowledge(CONFIG, knowledge_tree, skeleton, rng)
+        return knowledge_tree, skeleton
+
+    def _generate_knowledge(CONFIG, rng : RandomStream):
         knowledge_tree = KnowledgeTree()
-        KnowledgeGenerator.generate_topics_and_atoms(CONFIG, knowledge_tree)
-        KnowledgeGenerator.generate_atom_knowledge(CONFIG, knowledge_tree)
-        KnowledgeGenerator.generate_sub_layers(CONFIG, knowledge_tree)
-        KnowledgeGenerator.generate_names(CONFIG, knowledge_tree)
+        nr_of_workers = CONFIG["Knowledge"].get("Workers", 0)
+        KnowledgeGenerator.generate_topics_and_atoms(CONFIG, knowledge_tree, rng.child("Topics"))
+        if nr_of_workers > 0:
+            KnowledgeGenerator.generate_atom_knowledge_in_parallel(CONFIG, knowledge_tree, nr_of_workers, rng.child("Atoms"))
+            KnowledgeGenerator.generate_sub_layers_in_parallel(CONFIG, knowledge_tree, nr_of_workers, rng.child("SubLayers"))
+        else:
+            KnowledgeGenerator.generate_atom_knowledge(CONFIG, knowledge_tree, rng.child("Atoms"))
+            KnowledgeGenerator.generate_sub_layers(CONFIG, knowledge_tree, rng.child("SubLayers"))
+        knowledge_tree.build_index()
+        KnowledgeGenerator.generate_names(CONFIG, knowledge_tree, rng.child("Names"))
         return knowledge_tree
 
-    def _generate_network(CONFIG, knowledge_tree):
+    def _generate_network(CONFIG, knowledge_tree, rng : RandomStream):
         network = Network()
+        nr_of_workers = CONFIG["Network"].get("Workers", 0)
+        if nr_of_workers > 0:
+            NetworkGenerator.generate_websites_in_parallel(CONFIG, knowledge_tree, network, nr_of_workers, rng.child("Websites"))
         while NetworkGenerator.is_knowledge_satisfied(CONFIG, knowledge_tree, network) == False:
-            for _ in range(0, CONFIG["Network"]["SatisfactionFrequency"]):
-                website = NetworkGenerator.generate_website(CONFIG, knowledge_tree)
-                network.add_website(website)
-        NetworkGenerator.generate_external_links(CONFIG, knowledge_tree, network)
+            websites = NetworkGenerator.generate_websites(CONFIG, knowledge_tree, network, rng.child("Websites"))
+            network.add_websites(websites)
+        NetworkGenerator.generate_external_links(CONFIG, knowledge_tree, network, rng.child("ExternalLinks"))
         return network
 
     
-    def _obstruct_knowledge(CONFIG, knowledge_tree, network):
+    def _obstruct_knowledge(CONFIG, knowledge_tree, network, rng : RandomStream):
         pass
         
 
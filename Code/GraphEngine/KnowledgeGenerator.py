@@ -1,39 +1,44 @@
+from __future__ import annotations
 import numpy
 import math
-import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from GraphEngine.KnowledgeTreeStructures import *
 from GraphEngine.KnowledgeGraph import *
 from GraphEngine.ProbabilityEngine import ProbabilityEngine
+from GraphEngine.RandomStream import RandomStream
 
 
 
 class KnowledgeGenerator:
-    def generate_topics_and_atoms(CONFIG, knowledge_tree : KnowledgeTree):
+    _worker_state : dict = {}   #CONFIG, knowledge tree and random stream of a worker process, see generate_atom_knowledge_in_parallel
+
+    def generate_topics_and_atoms(CONFIG, knowledge_tree : KnowledgeTree, rng : RandomStream):
         k3_total_atoms = CONFIG["Knowledge"]["Shape"]["Atoms"]
-        topics_relative_info = KnowledgeGenerator._generate_topics_relative_info(CONFIG)     
+        topics_relative_info = KnowledgeGenerator._generate_topics_relative_info(CONFIG, rng)     
         intersections = KnowledgeGenerator._determine_intersections(topics_relative_info) 
         topics = KnowledgeGenerator._initiate_topics(topics_relative_info)
         knowledge_tree.add_topics([topics[key] for key in topics])
         atoms = KnowledgeGenerator._initiate_atoms(k3_total_atoms)
         KnowledgeGenerator._add_atoms_to_topics(knowledge_tree, atoms, topics, intersections)
 
-    def _generate_topics_relative_info(CONFIG):
+    def _generate_topics_relative_info(CONFIG, rng : RandomStream):
         k1_width = CONFIG["Knowledge"]["Shape"]["Width"]
         k2_depth_var = CONFIG["Knowledge"]["Shape"]["Variance"]
         k4_avg_intersect = CONFIG["Knowledge"]["Intersection"]["Average"]
         k5_intersect_var = CONFIG["Knowledge"]["Intersection"]["Variance"]
-        topics_info_depth = KnowledgeGenerator._generate_topics_relative_depth(k1_width, k2_depth_var)
-        topics_info_inter = KnowledgeGenerator._generate_topics_relative_intersection(k1_width, k4_avg_intersect, k5_intersect_var)
+        topics_info_depth = KnowledgeGenerator._generate_topics_relative_depth(k1_width, k2_depth_var, rng)
+        topics_info_inter = KnowledgeGenerator._generate_topics_relative_intersection(k1_width, k4_avg_intersect, k5_intersect_var, rng)
         topics_info = KnowledgeGenerator._merge_topic_dicts(topics_info_depth, topics_info_inter)
         return topics_info
     
-    def _generate_topics_relative_depth(nr_of_topics, depth_variance):
-        relative_depths = (numpy.random.uniform(-depth_variance, depth_variance, nr_of_topics) + 1) * 0.5
+    def _generate_topics_relative_depth(nr_of_topics, depth_variance, rng : RandomStream):
+        relative_depths = (rng.uniform(-depth_variance, depth_variance, nr_of_topics) + 1) * 0.5
         return {index: {"relative depth": relative_depth} for index, relative_depth in enumerate(relative_depths)}
 
-    def _generate_topics_relative_intersection(nr_of_topics, average_intersection, intersection_variance):
-        relative_intersections = numpy.random.uniform(-intersection_variance, intersection_variance, nr_of_topics)+average_intersection
+    def _generate_topics_relative_intersection(nr_of_topics, average_intersection, intersection_variance, rng : RandomStream):
+        relative_intersections = rng.uniform(-intersection_variance, intersection_variance, nr_of_topics)+average_intersection
         return {index: {"relative intersection": relative_intersection} for index, relative_intersection in enumerate(relative_intersections)} 
 
     def _merge_topic_dicts(dict_a, dict_b):
@@ -117,47 +122,85 @@ class KnowledgeGenerator:
                 atom_topics = [topics[id] for id in intersection[0]]
             knowledge_tree.add_atom(atom, atom_topics)
 
-    def generate_atom_knowledge(CONFIG, knowledge_tree):
+    def generate_atom_knowledge(CONFIG, knowledge_tree, rng : RandomStream):
+        #Atom i draws from rng.child(i)
         a1_triple_interval = CONFIG["Knowledge"]["Atoms"]["Triples"]
         a2_node_sparsity = CONFIG["Knowledge"]["Atoms"]["Nodes"]
         a3_edge_sparsity = CONFIG["Knowledge"]["Atoms"]["Edges"]
-        for atom in knowledge_tree.atoms:
-            nr_of_triples = numpy.random.randint(a1_triple_interval["Minimum"], a1_triple_interval["Maximum"]+1)
-            nr_of_portential_node_names = KnowledgeGenerator._generate_nr_of_potential_node_names(nr_of_triples, a2_node_sparsity)
-            nr_of_portential_edge_names = KnowledgeGenerator._generate_nr_of_potential_edge_names(nr_of_triples, a3_edge_sparsity)
-            triples = KnowledgeGenerator._generate_triples(nr_of_triples, nr_of_portential_node_names, nr_of_portential_edge_names)
+        for atom_index, atom in enumerate(knowledge_tree.atoms):
+            atom_rng = rng.child(atom_index)
+            nr_of_triples = atom_rng.integers(a1_triple_interval["Minimum"], a1_triple_interval["Maximum"]+1)
+            nr_of_portential_node_names = KnowledgeGenerator._generate_nr_of_potential_node_names(nr_of_triples, a2_node_sparsity, atom_rng)
+            nr_of_portential_edge_names = KnowledgeGenerator._generate_nr_of_potential_edge_names(nr_of_triples, a3_edge_sparsity, atom_rng)
+            triples = KnowledgeGenerator._generate_triples(nr_of_triples, nr_of_portential_node_names, nr_of_portential_edge_names, atom_rng)
             atom.add_triples(triples)
 
-    def _generate_nr_of_potential_node_names(nr_of_triples, node_sparsity):
+    def generate_atom_knowledge_in_parallel(CONFIG, knowledge_tree : KnowledgeTree, nr_of_workers : int, rng : RandomStream):
+        #The triple placeholders of atom i are drawn from rng.child(i) by a worker, and the triples are made here in atom order
+        #So the atoms get the same triples, with the same ids, as from generate_atom_knowledge
+        executor = KnowledgeGenerator._knowledge_executor(CONFIG, knowledge_tree, nr_of_workers, rng)
+        if executor == None:
+            return KnowledgeGenerator.generate_atom_knowledge(CONFIG, knowledge_tree, rng)
+        atoms = knowledge_tree.atoms
+        with executor:
+            descriptions = executor.map(KnowledgeGenerator._describe_atom_in_worker, range(0, len(atoms)), chunksize = max(1, len(atoms) // (4 * nr_of_workers)))
+            for atom, triple_placeholders in zip(atoms, descriptions):
+                atom.add_triples(KnowledgeGenerator._triples_from_placeholders(triple_placeholders))
+
+    def _describe_atom_in_worker(atom_index : int):
+        state = KnowledgeGenerator._worker_state
+        return KnowledgeGenerator._describe_atom(state["CONFIG"], state["RandomStream"].child(atom_index))
+
+    def _describe_atom(CONFIG, rng : RandomStream):
+        #The same draws as an atom of generate_atom_knowledge
+        a1_triple_interval = CONFIG["Knowledge"]["Atoms"]["Triples"]
+        a2_node_sparsity = CONFIG["Knowledge"]["Atoms"]["Nodes"]
+        a3_edge_sparsity = CONFIG["Knowledge"]["Atoms"]["Edges"]
+        nr_of_triples = rng.integers(a1_triple_interval["Minimum"], a1_triple_interval["Maximum"]+1)
+        nr_of_portential_node_names = KnowledgeGenerator._generate_nr_of_potential_node_names(nr_of_triples, a2_node_sparsity, rng)
+        nr_of_portential_edge_names = KnowledgeGenerator._generate_nr_of_potential_edge_names(nr_of_triples, a3_edge_sparsity, rng)
+        return KnowledgeGenerator._generate_triple_placeholders(nr_of_triples, nr_of_portential_node_names, nr_of_portential_edge_names, rng)
+
+    def _generate_nr_of_potential_node_names(nr_of_triples, node_sparsity, rng : RandomStream):
         min_nodes = math.ceil(0.5 * (1 + math.sqrt(4*nr_of_triples+1)))
         max_nodes = nr_of_triples+1
-        return int(ProbabilityEngine.HouseDistribution(min_nodes, max_nodes, node_sparsity["UniformArea"], node_sparsity["Sparsity"]))
+        return int(ProbabilityEngine.HouseDistribution(min_nodes, max_nodes, node_sparsity["UniformArea"], node_sparsity["Sparsity"], rng))
+
+    def _generate_nr_of_potential_edge_names(nr_of_triples, edge_sparsity, rng : RandomStream):
+        return int(ProbabilityEngine.HouseDistribution(2, nr_of_triples, edge_sparsity["UniformArea"], edge_sparsity["Sparsity"], rng))
 
-    def _generate_nr_of_potential_edge_names(nr_of_triples, edge_sparsity):
-        return int(ProbabilityEngine.HouseDistribution(2, nr_of_triples, edge_sparsity["UniformArea"], edge_sparsity["Sparsity"]))
+    def _generate_triples(nr_of_triples, nr_of_node_names, nr_of_edge_names, rng : RandomStream):
+        triple_placeholders = KnowledgeGenerator._generate_triple_placeholders(nr_of_triples, nr_of_node_names, nr_of_edge_names, rng)
+        return KnowledgeGenerator._triples_from_placeholders(triple_placeholders)
 
-    def _generate_triples(nr_of_triples, nr_of_node_names, nr_of_edge_names):
-        triple_placeholders = KnowledgeGenerator._generate_triple_placeholders(nr_of_triples, nr_of_node_names, nr_of_edge_names)
+    def _triples_from_placeholders(triple_placeholders):
         unique_nodes = KnowledgeGenerator._unique_nodes(triple_placeholders)
         KnowledgeGenerator._name_nodes(unique_nodes)
         edge_names = KnowledgeGenerator._edge_names(triple_placeholders)
         return KnowledgeGenerator._construct_triples(triple_placeholders, unique_nodes, edge_names)
 
-    def _generate_triple_placeholders(nr_of_triples, nr_of_node_names, nr_of_edge_names):
-        triple_placeholders = []
-        while len(triple_placeholders) < nr_of_triples:
-            placeholder = KnowledgeGenerator._generate_triple_placeholder(nr_of_node_names, nr_of_edge_names)
-            if placeholder not in triple_placeholders:
-                triple_placeholders += [placeholder]
-        return triple_placeholders
-
-    def _generate_triple_placeholder(nr_of_node_names, nr_of_edge_names):
-        object = numpy.random.randint(0, nr_of_node_names)
-        subject = numpy.random.randint(0, nr_of_node_names)
-        predicate = numpy.random.randint(0, nr_of_edge_names)
-        while object == subject:
-            subject = numpy.random.randint(0, nr_of_node_names)
-        return (object, subject, predicate)
+    def _generate_triple_placeholders(nr_of_triples, nr_of_node_names, nr_of_edge_names, rng : RandomStream):
+        #Distinct (object, subject, predicate) without self loops, in the order they are drawn. Candidates are drawn in blocks,
+        #self loops are masked, and a placeholder is kept the first time it is drawn, until there are nr_of_triples of them
+        nr_of_possible = nr_of_node_names * (nr_of_node_names-1) * nr_of_edge_names
+        if nr_of_triples > nr_of_possible:
+            raise Exception("There are not enough node and edge names for that many distinct triples")
+        keys = numpy.zeros(0, dtype=numpy.int64)
+        while len(keys) < nr_of_triples:
+            missing = nr_of_triples - len(keys)
+            #Large enough to fill the rest when the self loops and already drawn placeholders are removed
+            nr_of_candidates = math.ceil(1.1 * missing * nr_of_node_names / (nr_of_node_names-1) * nr_of_possible / (nr_of_possible - len(keys))) + 8
+            objects = rng.integers(0, nr_of_node_names, nr_of_candidates)
+            subjects = rng.integers(0, nr_of_node_names, nr_of_candidates)
+            predicates = rng.integers(0, nr_of_edge_names, nr_of_candidates)
+            no_loop = objects != subjects
+            candidate_keys = (objects[no_loop] * nr_of_node_names + subjects[no_loop]) * nr_of_edge_names + predicates[no_loop]
+            keys = numpy.concatenate((keys, candidate_keys))
+            _, firsts = numpy.unique(keys, return_index=True)
+            keys = keys[numpy.sort(firsts)][:nr_of_triples]
+        objects, rest = numpy.divmod(keys, nr_of_node_names * nr_of_edge_names)
+        subjects, predicates = numpy.divmod(rest, nr_of_edge_names)
+        return list(zip(objects.tolist(), subjects.tolist(), predicates.tolist()))
 
     def _unique_nodes(triple_placeholders):
         node_dict = {}
@@ -187,53 +230,125 @@ class KnowledgeGenerator:
             triples += [Triple(object, subject, predicate)]
         return triples
 
-    def generate_sub_layers(CONFIG, knowledge_tree : KnowledgeTree):
+    def generate_sub_layers(CONFIG, knowledge_tree : KnowledgeTree, rng : RandomStream):
+        #Topic i draws its layers from rng.child(i)
         s3_topic_threshold = CONFIG["Knowledge"]["SubTopics"]["TopicThreshold"]
-        for topic in knowledge_tree.topics:
+        for topic_index, topic in enumerate(knowledge_tree.topics):
+            topic_rng = rng.child(topic_index)
             layer_nr = 1
-            subtopics = KnowledgeGenerator._generate_sub_layer(CONFIG, knowledge_tree.get_atoms(topic), layer_nr)
+            subtopics = KnowledgeGenerator._generate_sub_layer(CONFIG, knowledge_tree.get_atoms(topic), layer_nr, topic_rng)
             while len(subtopics) > s3_topic_threshold:
                 knowledge_tree.add_subtopics(subtopics, layer_nr, topic)  
-                subtopics = KnowledgeGenerator._generate_sub_layer(CONFIG, subtopics, layer_nr) 
+                subtopics = KnowledgeGenerator._generate_sub_layer(CONFIG, subtopics, layer_nr, topic_rng) 
                 layer_nr += 1
             knowledge_tree.add_subtopics(subtopics, layer_nr, topic, last_layer = True)  
 
-    def _generate_sub_layer(CONFIG, elements, layer_nr):
+    def generate_sub_layers_in_parallel(CONFIG, knowledge_tree : KnowledgeTree, nr_of_workers : int, rng : RandomStream):
+        #The layers of topic i are generated from rng.child(i) by a worker, described by element positions, and rebuilt here in
+        #topic order. So the subtopics, their triples, ids and predicate names are the same as from generate_sub_layers
+        #The atoms must have their knowledge, as the subtopics draw from the predicates below them
+        executor = KnowledgeGenerator._knowledge_executor(CONFIG, knowledge_tree, nr_of_workers, rng)
+        if executor == None:
+            return KnowledgeGenerator.generate_sub_layers(CONFIG, knowledge_tree, rng)
+        topics = knowledge_tree.topics
+        with executor:
+            for topic, description in zip(topics, executor.map(KnowledgeGenerator._describe_sub_layers_in_worker, range(0, len(topics)))):
+                KnowledgeGenerator._build_sub_layers(CONFIG, knowledge_tree, topic, description)
+
+    def _describe_sub_layers_in_worker(topic_index : int) -> list:
+        state = KnowledgeGenerator._worker_state
+        with IdScope(IdAllocator.scratch()):
+            return KnowledgeGenerator._describe_sub_layers(state["CONFIG"], state["KnowledgeTree"], topic_index, state["RandomStream"].child(topic_index))
+
+    def _describe_sub_layers(CONFIG, knowledge_tree : KnowledgeTree, topic_index : int, rng : RandomStream) -> list:
+        #The same draws as a topic of generate_sub_layers. Layer k lists its subtopics as {"Elements": positions in layer k-1,
+        #"Triples": [(object, subject, predicate)]}. Layer 0 is the topic's atoms, and an element is (layer, position)
+        #A predicate is ("Unique", n), the n'th UniquePredicate name of the topic, or ("Label", label) of a triple below
+        s3_topic_threshold = CONFIG["Knowledge"]["SubTopics"]["TopicThreshold"]
+        layers = [(knowledge_tree.get_atoms(knowledge_tree.topics[topic_index]), None)]
+        unique_counter = UniquePredicate.unique_counter
+        UniquePredicate.unique_counter = 0
+        try:
+            layer_nr = 1
+            layers += [KnowledgeGenerator._generate_positioned_sub_layer(CONFIG, layers[-1][0], layer_nr, rng)]
+            while len(layers[-1][0]) > s3_topic_threshold:
+                layers += [KnowledgeGenerator._generate_positioned_sub_layer(CONFIG, layers[-1][0], layer_nr, rng)]
+                layer_nr += 1
+            unique_names = {UniquePredicate.construct_name(count): count for count in range(0, UniquePredicate.unique_counter)}
+        finally:
+            UniquePredicate.unique_counter = unique_counter
+        references = {element.id: (layer, position) for layer, (subtopics, _) in enumerate(layers) for position, element in enumerate(subtopics)}
+        predicate = lambda label: ("Unique", unique_names[label]) if label in unique_names else ("Label", label)
+        return [[{"Elements": positions, "Triples": [(references[triple.object.id], references[triple.subject.id], predicate(triple.predicate.label)) for triple in subtopic.get_own_triples()]}
+                 for subtopic, positions in zip(subtopics, element_positions)] for subtopics, element_positions in layers[1:]]
+
+    def _build_sub_layers(CONFIG, knowledge_tree : KnowledgeTree, topic : Topic, description : list):
+        #Makes the subtopics, triples and names in the order generate_sub_layers makes them
+        layers = [knowledge_tree.get_atoms(topic)]
+        unique_names = []
+        for layer_nr, layer in enumerate(description, 1):
+            subtopics = [KnowledgeGenerator._initiate_subtopic([layers[-1][position] for position in subtopic["Elements"]]) for subtopic in layer]
+            layers += [subtopics]
+            for subtopic, subtopic_description in zip(subtopics, layer):
+                unique_names += [UniquePredicate.name() for _ in range(0, len(subtopic.children))]
+                for (object_layer, object_position), (subject_layer, subject_position), (kind, label) in subtopic_description["Triples"]:
+                    predicate = unique_names[label] if kind == "Unique" else label
+                    subtopic.add_triple(Triple(layers[object_layer][object_position].node, layers[subject_layer][subject_position].node, predicate))
+            knowledge_tree.add_subtopics(subtopics, layer_nr, topic, last_layer = layer_nr == len(description))
+
+    def _knowledge_executor(CONFIG, knowledge_tree : KnowledgeTree, nr_of_workers : int, rng : RandomStream) -> ProcessPoolExecutor:
+        #With fork the workers inherit the knowledge tree instead of unpickling it. Ids made in a worker are scratch ids, so
+        #they do not collide with the ids of the tree the worker reads, however late the worker got it
+        if nr_of_workers <= 1:
+            return None
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        return ProcessPoolExecutor(nr_of_workers, mp_context=context, initializer=KnowledgeGenerator._init_worker, initargs=(CONFIG, knowledge_tree, rng))
+
+    def _init_worker(CONFIG, knowledge_tree : KnowledgeTree, rng : RandomStream) -> None:
+        KnowledgeGenerator._worker_state = {"CONFIG": CONFIG, "KnowledgeTree": knowledge_tree, "RandomStream": rng}
+
+    def _generate_sub_layer(CONFIG, elements, layer_nr, rng : RandomStream):
+        return KnowledgeGenerator._generate_positioned_sub_layer(CONFIG, elements, layer_nr, rng)[0]
+
+    def _generate_positioned_sub_layer(CONFIG, elements, layer_nr, rng : RandomStream):
+        #(Subtopics, the positions in elements of the elements of every subtopic)
         s1_element_interval = CONFIG["Knowledge"]["SubTopics"]["Elements"]
         s2_overlap = CONFIG["Knowledge"]["SubTopics"]["Overlap"]
         s4_merge_sparsity = CONFIG["Knowledge"]["SubTopics"]["Merge"]
-        subtopics = KnowledgeGenerator._generate_sub_topics(elements, s1_element_interval, s2_overlap, layer_nr)
+        element_positions = KnowledgeGenerator._generate_sub_topics(len(elements), s1_element_interval, s2_overlap, layer_nr, rng)
+        subtopics = [KnowledgeGenerator._initiate_subtopic([elements[position] for position in positions]) for positions in element_positions]
         for subtopic in subtopics:
-            KnowledgeGenerator._generate_subtopic_knowledge(subtopic, s4_merge_sparsity)
-        return subtopics
+            KnowledgeGenerator._generate_subtopic_knowledge(subtopic, s4_merge_sparsity, rng)
+        return subtopics, element_positions
 
-    def _generate_sub_topics(elements, element_interval, overlap, layer_nr):
-        layer_size = int(len(elements)*(1+(overlap)*(1/layer_nr)))
+    def _generate_sub_topics(nr_of_elements, element_interval, overlap, layer_nr, rng : RandomStream):
+        #The positions of the elements of every subtopic. An element can be in a subtopic more than once
+        layer_size = int(nr_of_elements*(1+(overlap)*(1/layer_nr)))
         subtopics = []
         #Use all elements a single time
         elements_used = 0
-        while elements_used < len(elements):
-            nr_of_subtopic_elements = KnowledgeGenerator._generate_nr_of_subtopic_elements(element_interval)
-            subtopic_elements = KnowledgeGenerator._extract_elements(elements, nr_of_subtopic_elements, elements_used)
+        while elements_used < nr_of_elements:
+            nr_of_subtopic_elements = KnowledgeGenerator._generate_nr_of_subtopic_elements(element_interval, rng)
+            subtopic_elements = KnowledgeGenerator._extract_elements(nr_of_elements, nr_of_subtopic_elements, elements_used)
             elements_used += len(subtopic_elements)
-            subtopics += [KnowledgeGenerator._initiate_subtopic(subtopic_elements)]
+            subtopics += [subtopic_elements]
         #Choose elements randomly
         while elements_used < layer_size:
-            nr_of_subtopic_elements = KnowledgeGenerator._generate_nr_of_subtopic_elements(element_interval)
-            subtopic_elements = KnowledgeGenerator._extract_random_elements(elements, nr_of_subtopic_elements)
+            nr_of_subtopic_elements = KnowledgeGenerator._generate_nr_of_subtopic_elements(element_interval, rng)
+            subtopic_elements = KnowledgeGenerator._extract_random_elements(nr_of_elements, nr_of_subtopic_elements, rng)
             elements_used += len(subtopic_elements)
-            subtopics += [KnowledgeGenerator._initiate_subtopic(subtopic_elements)]
+            subtopics += [subtopic_elements]
         return subtopics
 
-    def _generate_nr_of_subtopic_elements(element_interval):
-        numbers = numpy.random.randint(element_interval["Minimum"], element_interval["Maximum"]+1, 2)
+    def _generate_nr_of_subtopic_elements(element_interval, rng : RandomStream):
+        numbers = rng.integers(element_interval["Minimum"], element_interval["Maximum"]+1, 2)
         return int((numbers[0]+numbers[1])/2)
 
-    def _extract_elements(elements, nr_of_elements_to_extract, elements_used):
-        if (elements_used + nr_of_elements_to_extract) < len(elements):
-            return elements[elements_used:elements_used+nr_of_elements_to_extract]
+    def _extract_elements(nr_of_elements, nr_of_elements_to_extract, elements_used):
+        if (elements_used + nr_of_elements_to_extract) < nr_of_elements:
+            return list(range(elements_used, elements_used+nr_of_elements_to_extract))
         else:
-            return elements[elements_used:len(elements)]            
+            return list(range(elements_used, nr_of_elements))
 
     def _initiate_subtopic(subtopic_elements):
         topic = Topic()
@@ -242,33 +357,32 @@ class KnowledgeGenerator:
             element.add_parent(topic)
         return topic
 
-    def _extract_random_elements(elements, nr_of_subtopic_elements):
-        random_indexes = numpy.random.randint(0, len(elements), nr_of_subtopic_elements)
-        return [elements[random_index] for random_index in random_indexes]
+    def _extract_random_elements(nr_of_elements, nr_of_subtopic_elements, rng : RandomStream):
+        return rng.integers(0, nr_of_elements, nr_of_subtopic_elements).tolist()
 
-    def _generate_subtopic_knowledge(subtopic : Topic, merge_sparsity):
+    def _generate_subtopic_knowledge(subtopic : Topic, merge_sparsity, rng : RandomStream):
         nr_of_elements = len(subtopic.children)
-        nr_of_triples = int(ProbabilityEngine.HouseDistribution(nr_of_elements-1, nr_of_elements*(nr_of_elements+1), merge_sparsity["UniformArea"], merge_sparsity["Sparsity"]))
+        nr_of_triples = int(ProbabilityEngine.HouseDistribution(nr_of_elements-1, nr_of_elements*(nr_of_elements+1), merge_sparsity["UniformArea"], merge_sparsity["Sparsity"], rng))
         if nr_of_triples == 0: nr_of_triples += 1
         pool_of_predicates = [triple.predicate.label for triple in subtopic.triples if triple.predicate.label != "Is"] 
         pool_of_predicates += [UniquePredicate.name() for _ in range(0, nr_of_elements)]
         #Connect direct children
         while len(subtopic.children) > 1 and KnowledgeGenerator._elements_are_connected(subtopic) == False:
-            random_object = random.choice(subtopic.children)
-            random_subject = random.choice(subtopic.children)
+            random_object = rng.choice(subtopic.children)
+            random_subject = rng.choice(subtopic.children)
             while random_object == random_subject:
-                random_subject = random.choice(subtopic.children)
-            random_predicate = random.choice(pool_of_predicates)
+                random_subject = rng.choice(subtopic.children)
+            random_predicate = rng.choice(pool_of_predicates)
             subtopic.add_triple(Triple(random_object.node, random_subject.node, random_predicate))
             nr_of_triples -= 1 if nr_of_triples > 0 else 0
         #Connect cross layers
         pool_of_children = subtopic.all_children
         while len(subtopic.children) > 1 and nr_of_triples > 0:
-            random_object = random.choice(pool_of_children)
-            random_subject = random.choice(pool_of_children)
+            random_object = rng.choice(pool_of_children)
+            random_subject = rng.choice(pool_of_children)
             while random_object == random_subject:
-                random_subject = random.choice(pool_of_children)
-            random_predicate = random.choice(pool_of_predicates)
+                random_subject = rng.choice(pool_of_children)
+            random_predicate = rng.choice(pool_of_predicates)
             subtopic.add_triple(Triple(random_object.node, random_subject.node, random_predicate))
             nr_of_triples -= 1
 
@@ -278,32 +392,33 @@ class KnowledgeGenerator:
         children_unused = [child for child in subtopic.children if child.id not in children_in_triples]
         return len(children_unused) == 0
 
-    def generate_names(CONFIG, knowledge_tree : KnowledgeTree):
+    def generate_names(CONFIG, knowledge_tree : KnowledgeTree, rng : RandomStream):
         n1_distance = CONFIG["Knowledge"]["Names"]["Distance"]
         n2_several_names = CONFIG["Knowledge"]["Names"]["SeveralNames"]
         fifo = KnowledgeGenerator._create_fifo_queue()
+        name_index = NameDistanceIndex(knowledge_tree)
 
         for element in knowledge_tree.root.children:
-            knowledge_tree.add_name(element, UniqueName.name())
+            name_index.add_name(element, UniqueName.name())
             fifo.push(element.children, element)
 
         while len(fifo) > 0:
             element, parent = fifo.pop()
             fifo.push(element.children, element)
-            if len(element.names) == 0 or n2_several_names >= numpy.random.uniform(0.00001, 1):
+            if len(element.names) == 0 or n2_several_names >= rng.uniform(0.00001, 1):
                 if n1_distance > 0:
-                    closest_name_elements = KnowledgeGenerator._closest_elements(knowledge_tree, element)
+                    closest_name_elements = KnowledgeGenerator._closest_elements(name_index, element)
                     for name_element in closest_name_elements:
                         name = name_element[0]
                         if KnowledgeGenerator._valid_name(element, name):
                             increased_prob = 4 if element == name_element[2] else 0
-                            if (((1+n1_distance)**(name_element[1]-1+increased_prob))-1) > numpy.random.uniform(0.001, 1):
-                                knowledge_tree.add_name(element, name, parent = parent, children = element.children)
+                            if (((1+n1_distance)**(name_element[1]-1+increased_prob))-1) > rng.uniform(0.001, 1):
+                                name_index.add_name(element, name, parent = parent, children = element.children)
                                 break
                     if len(element.names) == 0:
-                        knowledge_tree.add_name(element, UniqueName.name())
+                        name_index.add_name(element, UniqueName.name())
                 else:
-                    knowledge_tree.add_name(element, UniqueName.name())
+                    name_index.add_name(element, UniqueName.name())
 
     def _create_fifo_queue():
         class FIFO:
@@ -327,29 +442,10 @@ class KnowledgeGenerator:
                     return False
         return True
 
-    def _closest_elements(knowledge_tree : KnowledgeTree, element : Topic) -> List[Tuple[Topic, int]]:
-        closest_elements = []
-        name_counter = 0
-        while name_counter < UniqueName.unique_counter:
-            name = UniqueName.construct_name(name_counter)
-            name_counter += 1
-            elements = knowledge_tree.get_elements_by_name(name)
-            closest_element = (None, 10000)
-            for match_element in elements:
-                dist = KnowledgeGenerator._dist_between_elements(knowledge_tree, element, match_element)
-                if dist < closest_element[1]:
-                    closest_element = (name, dist, match_element)
-            closest_elements += [closest_element]
-        return closest_elements
-
-    def _dist_between_elements(knowledge_tree, element_a, element_b):   
-        if knowledge_tree.same_topic(element_a, element_b): #Assumes the fastest route
-            dist = abs(knowledge_tree.get_layer(element_a) - knowledge_tree.get_layer(element_b)) + 2
-        else:
-            dist_to_root_a = abs(knowledge_tree.get_layer(element_a) - knowledge_tree.get_layer(knowledge_tree.get_topics(element_a)[0]))+1
-            dist_to_root_b = abs(knowledge_tree.get_layer(element_b) - knowledge_tree.get_layer(knowledge_tree.get_topics(element_b)[0]))+1
-            dist = dist_to_root_b + dist_to_root_b - 1
-        return dist
+    def _closest_elements(name_index : NameDistanceIndex, element : Topic):
+        #(name, distance, element) of the closest element with each name, in the order the names were made
+        for name in name_index.names:
+            yield name_index.closest_element(element, name)
 
 
 
@@ -357,6 +453,61 @@ class KnowledgeGenerator:
 
 
 
+class NameDistanceIndex:
+    #The named elements of a knowledge tree, for finding the closest element with a name without measuring the distance to all of them
+    #The distance from a to b is |layer a - layer b| + 2 if they share a topic, else 2 * (|layer b - layer of b's first topic| + 1) - 1
+    #So per name the holders are grouped by their set of topics (the bitmask of the KnowledgeTreeIndex), and in a group only
+    #the first holder per layer and the first holder with the smallest distance to its topic are kept. A query looks at groups, not holders
+    def __init__(self, knowledge_tree : KnowledgeTree):
+        self._knowledge_tree = knowledge_tree
+        self._tree_index = knowledge_tree.index if knowledge_tree.index != None else knowledge_tree.build_index()
+        self._elements = {}     #element id: (topic mask, layer, distance to another topic)
+        self._names = {}        #name: [holders], {topic mask: {"Layers": {layer: holder position}, "Other": (distance, holder position)}}
+
+    @property
+    def names(self) -> list[str]:
+        #In the order they were first given
+        return list(self._names)
+
+    def add_name(self, element : Topic, name : str, parent : Topic = None, children : list[Topic] = None) -> None:
+        self._knowledge_tree.add_name(element, name, parent = parent, children = children)
+        if name not in self._names:
+            self._names[name] = ([], {})
+        holders, groups = self._names[name]
+        topic_mask, layer, other_distance = self._element_info(element)
+        position = len(holders)
+        holders += [element]
+        if topic_mask not in groups:
+            groups[topic_mask] = {"Layers": {}, "Other": (other_distance, position)}
+        group = groups[topic_mask]
+        if layer not in group["Layers"]:
+            group["Layers"][layer] = position
+        if other_distance < group["Other"][0]:
+            group["Other"] = (other_distance, position)
+
+    def closest_element(self, element : Topic, name : str) -> Tuple[str, int, Topic]:
+        #The first holder of the name with the smallest distance, like comparing the holders one by one in order
+        holders, groups = self._names[name]
+        topic_mask, layer, _ = self._element_info(element)
+        closest = (10000, None)
+        for holder_mask, group in groups.items():
+            if holder_mask & topic_mask:
+                for holder_layer, position in group["Layers"].items():
+                    closest = min(closest, (abs(layer - holder_layer) + 2, position))
+            else:
+                closest = min(closest, group["Other"])
+        return (name, closest[0], holders[closest[1]])
+
+    def _element_info(self, element : Topic) -> Tuple[int, int, int]:
+        if element.id not in self._elements:
+            topics = self._tree_index.get_topics(element)
+            layer = self._tree_index.get_layer(element)
+            distance_to_topic = abs(layer - self._tree_index.get_layer(topics[0])) + 1
+            self._elements[element.id] = (self._tree_index.topic_mask(element), layer, 2 * distance_to_topic - 1)
+        return self._elements[element.id]
+
+
+
 class UniqueName:
     unique_counter = 0
     def name(name_length = 4):
@@ -1,9 +1,40 @@
 from __future__ import annotations
-from typing import Any, List, Union, Dict, Set, Tuple
+from typing import Any, List, Union, Dict, Set, Tuple, Iterable
+import hashlib
+
+
+
+class TermDictionary:
+    def __init__(self):
+        #Interns node names and edge labels to dense ints, so repeated terms are stored once and compared as ints
+        self._terms : list = []
+        self._term_ids : dict = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def intern(self, term) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id == None:
+            term_id = len(self._terms)
+            self._term_ids[term] = term_id
+            self._terms += [term]
+        return term_id
+
+    def term(self, term_id : int):
+        return self._terms[term_id]
+
+    def term_id(self, term) -> int:
+        #None if the term has never been interned
+        return self._term_ids.get(term)
+
+TermDictionary.shared = TermDictionary()    #Used by all graphs. Term ids are only valid inside this process
+
 
 
 
 class Triple:
+    __slots__ = ("_object", "_subject", "_predicate")
     def __init__(self, object : Node, subject : Node, predicate: Edge | str = None):
         self._object = object
         self._subject = subject
@@ -17,6 +48,14 @@ class Triple:
     def __eq__(self, triple: Triple) -> bool:
         return self.object == triple.object and self.subject == triple.subject and self.predicate == triple.predicate
 
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    @property
+    def key(self) -> Tuple[int, int, int]:
+        #(object id, subject id, label id). Equal for equal triples
+        return (self._object.id, self._subject.id, self._predicate.label_id)
+
     @property
     def object(self) -> Node:
         return self._object
@@ -98,18 +137,88 @@ class Property:
 
 
 
+class IdAllocator:
+    scratch_start = 2**62   #See scratch
+
+    def __init__(self, start : int = 0, stop : int = None):
+        #Hands out the ids in [start, stop). Without a stop the range is unbounded
+        self._start = start
+        self._next = start
+        self._stop = stop
+
+    @property
+    def start(self) -> int:
+        return self._start
+
+    @property
+    def stop(self) -> int:
+        return self._stop
+
+    @property
+    def next(self) -> int:
+        return self._next
+
+    def in_range(self, id : int) -> bool:
+        return self._start <= id and (self._stop == None or id < self._stop)
+
+    def next_id(self, id : int = None) -> int:
+        if id == None:
+            if self._stop != None and self._next >= self._stop:
+                raise Exception(f"All ids in the range [{self._start}, {self._stop}) have been used")
+            id = self._next
+            self._next += 1
+        elif self._next <= id and self.in_range(id):    #Explicit ids are never handed out again
+            self._next = id + 1
+        return id
+
+    def reserve(self, nr_of_ids : int) -> IdAllocator:
+        #Takes the next nr_of_ids ids out of this allocator, e.g. for a worker process
+        if self._stop != None and self._next + nr_of_ids > self._stop:
+            raise Exception(f"Cannot reserve {nr_of_ids} ids, only {self._stop - self._next} are left")
+        allocator = IdAllocator(self._next, self._next + nr_of_ids)
+        self._next += nr_of_ids
+        return allocator
+
+    def split(self, nr_of_allocators : int, nr_of_ids : int) -> List[IdAllocator]:
+        #Disjoint ranges in a fixed order, so allocator i always gets the same ids
+        return [self.reserve(nr_of_ids) for _ in range(0, nr_of_allocators)]
+
+    def scratch() -> IdAllocator:
+        #For entities that only live while something is generated to be described, like the websites of a worker
+        #Generations count their ids from far below scratch_start, so scratch ids never collide with the ids of a
+        #knowledge tree or network, in this process or in one the tree was sent to at any later time
+        return IdAllocator(IdAllocator.scratch_start)
+
+
+
+class IdScope:
+    def __init__(self, allocator : IdAllocator = None):
+        #with IdScope(allocator): every Identifier created inside the block gets its id from allocator
+        self._allocator = IdAllocator() if allocator == None else allocator
+        self._previous_allocator = None
+
+    def __enter__(self) -> IdAllocator:
+        self._previous_allocator = Identifier.allocator()
+        Identifier._allocator = self._allocator
+        return self._allocator
+
+    def __exit__(self, exception_type, exception, traceback) -> None:
+        Identifier._allocator = self._previous_allocator
+
+
+
 class Identifier:
-    _id_count = 0
+    __slots__ = ("_id",)
+    _allocator = IdAllocator()
     def __init__(self, id = None):
-        if id == None:
-            self._id = Identifier._id_count
-            Identifier._id_count += 1
-        else:
-            self._id = id
-            if Identifier._id_count < id:
-                Identifier._id_count = id + 1
+        self._id = Identifier.next_id(id)
 
-        
+    def next_id(id = None) -> int:
+        #Entities store the returned int directly instead of an Identifier object
+        return Identifier._allocator.next_id(id)
+
+    def allocator() -> IdAllocator:
+        return Identifier._allocator
 
     @property
     def value(self) -> int:
@@ -122,15 +231,28 @@ class Identifier:
 
 
 class Node:
+    __slots__ = ("_id", "_name_id", "_out_edges", "_in_edges", "_classes", "_properties")
     def __init__(self, name : str = " ", id=None):
-        self._identifier = Identifier(id)
-        self._name = name
-        self._edges = {}
-        self._classes = {}    
-        self._properties = {}
+        self._id = Identifier.next_id(id)
+        self._name_id = TermDictionary.shared.intern(name)
+        self._out_edges = None      #{to_node_id -> {edge_id -> Edge}}, created with the first outgoing edge
+        self._in_edges = None       #{from_node_id -> {edge_id -> Edge}}, created with the first incoming edge
+        self._classes = None    
+        self._properties = None
 
     def set_name(self, name):
-        self._name = name
+        self._name_id = TermDictionary.shared.intern(name)
+
+    def __getstate__(self):
+        #Terms are pickled by value since term ids are local to a process
+        state = {slot: getattr(self, slot) for slot in Node.__slots__ if slot != "_name_id"}
+        return state | {"_name": self.name}
+
+    def __setstate__(self, state):
+        for slot in state:
+            if slot != "_name":
+                setattr(self, slot, state[slot])
+        self._name_id = TermDictionary.shared.intern(state["_name"])
 
     def __eq__(self, node: Node) -> bool:
         if not isinstance(node, Node):
@@ -138,14 +260,28 @@ class Node:
         return self.id == node.id
 
     def add_edge(self, edge : Edge) -> None:
-        self._edges[edge.id] = edge
+        adjacency, neighbor_id = self._adjacency(edge)
+        if neighbor_id not in adjacency:
+            adjacency[neighbor_id] = {}
+        adjacency[neighbor_id][edge.id] = edge
 
     def remove_edge(self, edge : Edge) -> None:
-        if edge.id in self._edges:
-            del self._edges[edge.id]
+        adjacency, neighbor_id = self._adjacency(edge)
+        if neighbor_id in adjacency and edge.id in adjacency[neighbor_id]:
+            del adjacency[neighbor_id][edge.id]
+            if len(adjacency[neighbor_id]) == 0:
+                del adjacency[neighbor_id]
+
+    def _adjacency(self, edge : Edge) -> Tuple[dict, int]:
+        if edge.from_node.id == self._id:
+            if self._out_edges == None: self._out_edges = {}
+            return self._out_edges, edge.to_node.id
+        if self._in_edges == None: self._in_edges = {}
+        return self._in_edges, edge.from_node.id
 
     def add_class(self, class_node : Node, class_edge = None) -> Edge:
         if class_node == None: return None
+        if self._classes == None: self._classes = {}
         if class_edge != None: 
             self._classes[class_node.id] = class_node
             edge = class_edge
@@ -159,6 +295,7 @@ class Node:
         return [self.add_class(node) for node in class_nodes]
 
     def add_property(self, property_node : Node, property_type : str) -> Edge:
+        if self._properties == None: self._properties = {}
         if isinstance(property_type, Edge):
             self._properties[property_node.id] = property_node
             edge = property_type
@@ -171,37 +308,49 @@ class Node:
         if isinstance(properties, None): return
         return [self.add_property(property[0], property[1]) for property in properties]
 
-    def get_edges_to(self, node : Union[Node, int]) -> Edge:
-        try:
-            if isinstance(node, Node):
-                return [self._edges[edge_id] for edge_id in self._edges if self._edges[edge_id].to_node == node]
-            else:
-                return [self._edges[edge_id] for edge_id in self._edges if self._edges[edge_id].to_node.id == node]
-        except:
-            raise Exception(f"No edges points to node: {node.id}")
+    def get_edges_to(self, node : Union[Node, int]) -> List[Edge]:
+        node_id = node.id if isinstance(node, Node) else node
+        if self._out_edges == None or node_id not in self._out_edges: return []
+        return list(self._out_edges[node_id].values())
+
+    def get_edges_from(self, node : Union[Node, int]) -> List[Edge]:
+        node_id = node.id if isinstance(node, Node) else node
+        if self._in_edges == None or node_id not in self._in_edges: return []
+        return list(self._in_edges[node_id].values())
+
+    def get_edges_between(self, node : Union[Node, int]) -> List[Edge]:
+        return self.get_edges_to(node) + self.get_edges_from(node)
             
     @property
     def id(self) -> int:
-        return self._identifier.value
+        return self._id
         
     @property
     def name(self) -> str:
-        return self._name
+        return TermDictionary.shared.term(self._name_id)
 
     @property
-    def edges(self) -> List[Edge]:
-        return self._edges
+    def name_id(self) -> int:
+        return self._name_id
+
+    @property
+    def edges(self) -> Dict[int, Edge]:
+        adjacencies = [adjacency for adjacency in [self._out_edges, self._in_edges] if adjacency != None]
+        return {edge_id: edge for adjacency in adjacencies for edges in adjacency.values() for edge_id, edge in edges.items()}
 
     @property
     def nr_of_edges(self) -> int:
-        return len([key for key in self._edges])
+        adjacencies = [adjacency for adjacency in [self._out_edges, self._in_edges] if adjacency != None]
+        return sum([len(edges) for adjacency in adjacencies for edges in adjacency.values()])
 
     @property
     def classes(self) -> List[Tuple[Node, Edge]]:
+        if self._classes == None: return []
         return [(self._classes[node_id], self.get_edges_to(node_id)) for node_id in self._classes]
 
     @property
     def properties(self) -> List[Tuple[Node, Edge]]:
+        if self._properties == None: return []
         return [(self._properties[property_id], self.get_edges_to(property_id)) for property_id in self._properties]
 
 
@@ -210,20 +359,29 @@ class Node:
 
 
 class Edge:
+    __slots__ = ("_id", "_from_node", "_to_node", "_label_id")
     def __init__(self, from_node, to_node, label = None, id = None):
         self._check_nodes(from_node, to_node)
-        self._id = Identifier(id)
+        self._id = Identifier.next_id(id)
         self._from_node = from_node
         self._to_node = to_node
+        self._label_id = TermDictionary.shared.intern(label)
         self.from_node.add_edge(self)
         self.to_node.add_edge(self)
-        self._types = {}    
-        self._properties = {}
-        self._label = label
         #self._edge_node = Node(name)
 
     def set_label(self, label):
-        self._label = label
+        self._label_id = TermDictionary.shared.intern(label)
+
+    def __getstate__(self):
+        state = {slot: getattr(self, slot) for slot in Edge.__slots__ if slot != "_label_id"}
+        return state | {"_label": self.label}
+
+    def __setstate__(self, state):
+        for slot in state:
+            if slot != "_label":
+                setattr(self, slot, state[slot])
+        self._label_id = TermDictionary.shared.intern(state["_label"])
 
     def _check_nodes(self, from_node : Node, to_node : Node):
         if from_node == to_node:
@@ -234,7 +392,7 @@ class Edge:
             return False
         from_check = self.from_node == edge.from_node
         to_check = self.to_node == edge.to_node
-        label_check = self.label == edge.label
+        label_check = self._label_id == edge._label_id
         return  from_check and to_check and label_check
 
     #def add_type(self, type_node : Node) -> Edge:
@@ -267,7 +425,7 @@ class Edge:
 
     @property
     def id(self):
-        return self._id.value
+        return self._id
 
     @property
     def id_pair(self):
@@ -275,7 +433,11 @@ class Edge:
     
     @property
     def label(self):
-        return self._label
+        return TermDictionary.shared.term(self._label_id)
+
+    @property
+    def label_id(self) -> int:
+        return self._label_id
 
     
 
@@ -283,21 +445,145 @@ class Edge:
 
 
 
+class TripleIndex:
+    def __init__(self, edges : List[Edge] = []):
+        #Following Triple, the object is the from node and the subject is the to node
+        self._spo = {}  #{subject_id -> {label -> {object_id -> {edge_id -> Edge}}}}
+        self._pos = {}  #{label -> {object_id -> {subject_id -> {edge_id -> Edge}}}}
+        self._osp = {}  #{object_id -> {subject_id -> {label -> {edge_id -> Edge}}}}
+        for edge in edges:
+            self.add(edge)
+
+    def _index_keys(self, edge : Edge):
+        subject, predicate, object = edge.to_node.id, edge.label_id, edge.from_node.id
+        return [(self._spo, [subject, predicate, object]), (self._pos, [predicate, object, subject]), (self._osp, [object, subject, predicate])]
+
+    def add(self, edge : Edge) -> None:
+        for index, keys in self._index_keys(edge):
+            level = index
+            for key in keys:
+                if key not in level:
+                    level[key] = {}
+                level = level[key]
+            level[edge.id] = edge
+
+    def remove(self, edge : Edge) -> None:
+        for index, keys in self._index_keys(edge):
+            self._remove_from_level(index, keys, edge.id)
+
+    def _remove_from_level(self, level : dict, keys : list, edge_id : int) -> None:
+        if len(keys) == 0:
+            level.pop(edge_id, None)
+        elif keys[0] in level:
+            self._remove_from_level(level[keys[0]], keys[1:], edge_id)
+            if len(level[keys[0]]) == 0:
+                del level[keys[0]]
+
+    def match(self, subject : int = None, predicate : int = None, object : int = None):
+        #Predicates are label ids. None is a wildcard. Picks the permutation where the bound terms form a prefix
+        if subject != None and object != None:
+            return self._edges_under(self._spo, [subject, predicate, object]) if predicate != None else self._edges_under(self._osp, [object, subject])
+        if subject != None:
+            return self._edges_under(self._spo, [subject] if predicate == None else [subject, predicate])
+        if predicate != None:
+            return self._edges_under(self._pos, [predicate] if object == None else [predicate, object])
+        if object != None:
+            return self._edges_under(self._osp, [object])
+        return self._edges_under(self._spo, [])
+
+    def _edges_under(self, index : dict, keys : list):
+        level = index
+        for key in keys:
+            if key not in level:
+                return iter(())
+            level = level[key]
+        return self._iterate_level(level, 3 - len(keys))
+
+    def _iterate_level(self, level : dict, depth : int):
+        if depth == 0:
+            yield from level.values()
+        else:
+            for sub_level in level.values():
+                yield from self._iterate_level(sub_level, depth - 1)
+
+
+
+
 class Graph:
-    def __init__(self, nodes = None, edges = None, triples : list[Triple] = None, graphs : list[Graph] = None):
-        if triples != None:
-            nodes = [triple.object for triple in triples] + [triple.subject for triple in triples]
-            edges = [triple.predicate for triple in triples]
-        if graphs != None:
-            nodes = [node for graph in graphs for node in graph.nodes]
-            edges = [edge for graph in graphs for edge in graph.edges]
-        self._dict_of_nodes = self._populate_dict_of_nodes(nodes)
-        self._dict_of_words = self._populate_dict_of_words(nodes)
-        self._dict_of_edges : dict[int, Edge] = self._populate_dict_of_edges(edges)
+    _fingerprint_modulo = 2**64
+    def __init__(self, nodes = None, edges = None, triples : Iterable[Triple] = None, graphs : Iterable[Graph] = None, triple_index = False):
+        if triples != None or graphs != None:
+            self._populate_from_union(graphs, triples, structural = False)
+        else:
+            self._dict_of_nodes = self._populate_dict_of_nodes(nodes)
+            self._dict_of_words = self._populate_dict_of_words(nodes)
+            self._dict_of_edges : dict[int, Edge] = self._populate_dict_of_edges(edges)
+            self._fingerprint = self._populate_fingerprint(self._dict_of_edges)
+        self._triple_index : TripleIndex = TripleIndex(self._dict_of_edges.values()) if triple_index else None
+
+    def union(graphs : Iterable[Graph] = None, triples : Iterable[Triple] = None, structural = False, triple_index = False) -> Graph:
+        #One graph from all the graphs and triples, built in a single pass without collecting nodes and edges in lists first
+        #With structural, edges with the same from node, to node and label as an earlier edge are left out, not only equal ids
+        graph = Graph()
+        graph._populate_from_union(graphs, triples, structural)
+        if triple_index:
+            graph.build_triple_index()
+        return graph
+
+    def _populate_from_union(self, graphs : Iterable[Graph], triples : Iterable[Triple], structural : bool) -> None:
+        self._dict_of_nodes = {}
+        self._dict_of_words = {}
+        self._dict_of_edges = {}
+        self._fingerprint = 0
+        structural_keys = set() if structural else None
+        for graph in (graphs if graphs != None else []):
+            for node in graph._dict_of_nodes.values():
+                self._union_node(node)
+            for edge in graph._dict_of_edges.values():
+                self._union_edge(edge, structural_keys)
+        for triple in (triples if triples != None else []):
+            self._union_node(triple.object)
+            self._union_node(triple.subject)
+            self._union_edge(triple.predicate, structural_keys)
+        self._fingerprint %= Graph._fingerprint_modulo
+
+    def _union_node(self, node : Node) -> None:
+        if node.id in self._dict_of_nodes: return
+        self._dict_of_nodes[node.id] = node
+        if node.name_id not in self._dict_of_words:
+            self._dict_of_words[node.name_id] = {}
+        self._dict_of_words[node.name_id][node.id] = node
+
+    def _union_edge(self, edge : Edge, structural_keys : set) -> None:
+        if edge.id in self._dict_of_edges: return
+        if structural_keys != None:
+            structural_key = (edge.from_node.id, edge.to_node.id, edge.label_id)
+            if structural_key in structural_keys: return
+            structural_keys.add(structural_key)
+        self._dict_of_edges[edge.id] = edge
+        self._fingerprint += self._edge_fingerprint(edge)
+
+    def __getstate__(self):
+        #The word dict and the triple index are keyed by term ids, which are local to a process. They are rebuilt from the
+        #nodes and edges when unpickled, which are restored before the graph since they never refer to a graph
+        state = dict(self.__dict__)
+        del state["_dict_of_words"]
+        state["_triple_index"] = state.get("_triple_index") != None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._dict_of_words = self._populate_dict_of_words(list(self._dict_of_nodes.values()))
+        self._triple_index = TripleIndex(self._dict_of_edges.values()) if state["_triple_index"] else None
 
     def __eq__(self, graph : Graph) -> bool:
         return self.nodes == graph.nodes and self.edges == graph.edges
 
+    @property
+    def fingerprint(self) -> int:
+        #Order independent hash of the (from, to, label) triples. Equal triples gives equal fingerprints
+        return self._fingerprint
+
     @property
     def nodes(self) -> List[Node]:
         return self.get_nodes()
@@ -310,6 +596,25 @@ class Graph:
     def triples(self) -> list[Triple]:
         return [Triple(edge.from_node, edge.to_node, edge.label) for edge in self._dict_of_edges.values()]
 
+    @property
+    def has_triple_index(self) -> bool:
+        return self._triple_index != None
+
+    def build_triple_index(self) -> None:
+        #From now on the SPO/POS/OSP indexes are kept up to date by add_edge and remove_edge
+        if self._triple_index == None:
+            self._triple_index = TripleIndex(self._dict_of_edges.values())
+
+    def match(self, subject : Union[Node, int] = None, predicate = None, object : Union[Node, int] = None):
+        #Iterator over the edges object -predicate-> subject, where None matches anything. Builds the triple index on first use
+        self.build_triple_index()
+        subject = subject.id if isinstance(subject, Node) else subject
+        object = object.id if isinstance(object, Node) else object
+        if predicate != None:
+            predicate = TermDictionary.shared.term_id(predicate)
+            if predicate == None: return iter(())
+        return self._triple_index.match(subject, predicate, object)
+
     def subset_of(self, graph : Graph) -> bool:
         for node in self.nodes:
             if graph.node_exist(node) == False:
@@ -330,19 +635,27 @@ class Graph:
 
     def _populate_dict_of_words(self, nodes : list[Node]):
         if nodes == None: return {}
-        dict_of_words = {node.name: {} for node in nodes}
+        dict_of_words = {node.name_id: {} for node in nodes}
         for node in nodes:
-            dict_of_words[node.name][node.id] = node
+            dict_of_words[node.name_id][node.id] = node
         return dict_of_words
 
     def _populate_dict_of_edges(self, edges : list[Edge]) -> dict[int, Edge]:
         return {edge.id: edge for edge in edges} if edges != None else {}
 
+    def _populate_fingerprint(self, dict_of_edges : dict[int, Edge]) -> int:
+        return sum([self._edge_fingerprint(edge) for edge in dict_of_edges.values()]) % Graph._fingerprint_modulo
+
+    def _edge_fingerprint(self, edge : Edge) -> int:
+        #Deterministic across processes, which the builtin hash of strings is not
+        triple_key = repr((edge.from_node.id, edge.to_node.id, edge.label)).encode()
+        return int.from_bytes(hashlib.blake2b(triple_key, digest_size=8).digest(), "little")
+
     def add_node(self, node: Node) -> None:
         self._dict_of_nodes[node.id] = node
-        if node.name not in self._dict_of_words:
-            self._dict_of_words[node.name] = {}
-        self._dict_of_words[node.name][node.id] = node
+        if node.name_id not in self._dict_of_words:
+            self._dict_of_words[node.name_id] = {}
+        self._dict_of_words[node.name_id][node.id] = node
 
     def add_nodes(self, nodes : List[Node]) -> None:
         for node in nodes:
@@ -351,7 +664,7 @@ class Graph:
     def remove_node(self, node: Node) -> None:
         if node.id in self._dict_of_nodes:
             del self._dict_of_nodes[node.id]
-            del self._dict_of_words[node.name][node.id]
+            del self._dict_of_words[node.name_id][node.id]
 
     def add_edge(self, edge: Edge) -> None:
         self._add_edge_to_dict_of_edges(edge)
@@ -371,10 +684,17 @@ class Graph:
 
     def _remove_from_dict_of_edges(self, edge : Edge) -> None:
         if edge.id in self._dict_of_edges:
+            self._fingerprint = (self._fingerprint - self._edge_fingerprint(self._dict_of_edges[edge.id])) % Graph._fingerprint_modulo
+            if self._triple_index != None:
+                self._triple_index.remove(self._dict_of_edges[edge.id])
             del self._dict_of_edges[edge.id]
 
     def _add_edge_to_dict_of_edges(self, edge : Edge) -> None:
+        self._remove_from_dict_of_edges(edge)
         self._dict_of_edges[edge.id] = edge
+        self._fingerprint = (self._fingerprint + self._edge_fingerprint(edge)) % Graph._fingerprint_modulo
+        if self._triple_index != None:
+            self._triple_index.add(edge)
 
     def _add_edge_to_nodes(self, edge : Edge) -> None:
         self._dict_of_nodes[edge.from_node.id].add_edge(edge)
@@ -389,6 +709,10 @@ class Graph:
     def get_node(self, id) -> Node:
         return self._dict_of_nodes[id]
 
+    def get_nodes_by_name(self, name : str) -> List[Node]:
+        nodes = self._dict_of_words.get(TermDictionary.shared.term_id(name), {})
+        return [nodes[node_id] for node_id in nodes]
+
     def get_node_ids(self):
         return [key for key in self._dict_of_nodes]
 
@@ -399,11 +723,65 @@ class Graph:
         if isinstance(node_a, Edge):
             node_b = node_a.to_node
             node_a = node_a.from_node
-        elif isinstance(node_a, Identifier.type):
+        elif isinstance(node_a, int):
             node_a = self.get_node(node_a)
             node_b = self.get_node(node_b)
-        return [node_a.edges[key] for key in node_a.edges if key in node_b.edges]
+        return node_a.get_edges_between(node_b)
 
     def print_info(self):
         print('Nodes: ' + ''.join(f"{self._dict_of_nodes[id].name}-{str(self._dict_of_nodes[id].id)}, " for id in self._dict_of_nodes)[:-2])
-        print("Edges: " + ''.join(f"{self._dict_of_edges[id].from_node.name}->{self._dict_of_edges[id].to_node.name}, " for id in self._dict_of_edges)[:-2])
\ No newline at end of file
+        print("Edges: " + ''.join(f"{self._dict_of_edges[id].from_node.name}->{self._dict_of_edges[id].to_node.name}, " for id in self._dict_of_edges)[:-2])
+
+
+
+
+class FrozenGraph(Graph):
+    def __init__(self, graph : Graph):
+        #Read-only view of graph. The indexes are shared with graph, so nothing is copied
+        if isinstance(graph, FrozenGraph):
+            graph = graph._graph
+        self._graph = graph
+        self._dict_of_nodes = graph._dict_of_nodes
+        self._dict_of_words = graph._dict_of_words
+        self._dict_of_edges = graph._dict_of_edges
+
+    def __getstate__(self):
+        return {"_graph": self._graph}
+
+    def __setstate__(self, state):
+        FrozenGraph.__init__(self, state["_graph"])
+
+    @property
+    def fingerprint(self) -> int:
+        return self._graph.fingerprint
+
+    @property
+    def has_triple_index(self) -> bool:
+        return self._graph.has_triple_index
+
+    def build_triple_index(self) -> None:
+        self._graph.build_triple_index()
+
+    def match(self, subject : Union[Node, int] = None, predicate = None, object : Union[Node, int] = None):
+        return self._graph.match(subject, predicate, object)
+
+    def _read_only(self):
+        raise Exception("A frozen graph cannot be changed")
+
+    def add_node(self, node: Node) -> None:
+        self._read_only()
+
+    def add_nodes(self, nodes : List[Node]) -> None:
+        self._read_only()
+
+    def remove_node(self, node: Node) -> None:
+        self._read_only()
+
+    def add_edge(self, edge: Edge) -> None:
+        self._read_only()
+
+    def add_edges(self, edges: List[Edge]) -> None:
+        self._read_only()
+
+    def remove_edge(self, edge : Edge) -> None:
+        self._read_only()
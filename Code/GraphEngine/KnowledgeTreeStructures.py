@@ -1,4 +1,6 @@
 from __future__ import annotations
+import numpy
+
 from GraphEngine.KnowledgeGraph import *
 from GraphEngine.Structures import *
 
@@ -20,6 +22,8 @@ class KnowledgeTree:
 
         self._website_trust : dict[int, float] = {}
 
+        self._index : KnowledgeTreeIndex = None     #See build_index
+
     @property
     def atoms(self) -> list[Topic]:
         return [self._atoms[key]["Atom"] for key in self._atoms]
@@ -51,6 +55,16 @@ class KnowledgeTree:
     @property
     def tree_graph(self) -> Graph:
         return self._tree_graph
+
+    @property
+    def index(self) -> KnowledgeTreeIndex:
+        return self._index
+
+    def build_index(self) -> KnowledgeTreeIndex:
+        #Call when the topics, subtopics and atoms are all added. Layer and topic lookups then use the index
+        #Adding a topic, subtopic or atom drops it again
+        self._index = KnowledgeTreeIndex(self)
+        return self._index
             
     def get_node(self, topic_id : int) -> Topic:
         if topic_id in self._topics: return self._topics[topic_id]["Topic"]
@@ -67,6 +81,7 @@ class KnowledgeTree:
             return [TopicEdge(topic_b, topic_a)]
         
     def add_topic(self, topic : Topic) -> None:
+        self._index = None
         self._topics[topic.id] = {"Topic": topic, "Atoms": {}, "SubTopics": {}, "Layer": 0}
         topic.add_parent(self._root)
         self._root.add_child(topic)
@@ -79,6 +94,7 @@ class KnowledgeTree:
             self.add_topic(topic)
 
     def add_atom(self, atom : Topic, topics : list[Topic]) -> None:
+        self._index = None
         self._atoms[atom.id] = {"Atom" : atom, "Topics": {}, "Layer": 0}
         self._tree_graph.add_node(atom.node)
         for topic in topics:
@@ -89,6 +105,7 @@ class KnowledgeTree:
                 self._topic_to_pages[atom.id] = []        
             
     def add_subtopic(self, subtopic : Topic, layer : int, topic : Topic, last_layer = False) -> None:
+        self._index = None
         self._subtopics[subtopic.id] = {"SubTopic" : subtopic, "Topic": topic, "Layer": layer}
         self._tree_graph.add_node(subtopic.node)
         self._tree_graph.add_edges([triple.predicate for triple in subtopic._triples_to_children.values()])
@@ -123,6 +140,8 @@ class KnowledgeTree:
         return self._names[name]
 
     def get_topics(self, element : Topic) -> list[Topic]:
+        if self._index != None:
+            return self._index.get_topics(element)
         if self.is_topic(element):
             return [element]
         elif self.is_atom(element):
@@ -131,6 +150,8 @@ class KnowledgeTree:
             return [self._subtopics[element.id]["Topic"]]
     
     def same_topic(self, element_a : Topic, element_b : Topic) -> bool:
+        if self._index != None:
+            return self._index.same_topic(element_a, element_b)
         topics_a = self.get_topics(element_a)
         topics_b = self.get_topics(element_b)
         for topic_a in topics_a:
@@ -139,6 +160,8 @@ class KnowledgeTree:
         return False
     
     def get_layer(self, element: Topic) -> int:
+        if self._index != None:
+            return self._index.get_layer(element)
         if element.id in self._topics:
             return self._topics[element.id]["Layer"]
         elif element.id in self._subtopics:
@@ -166,6 +189,15 @@ class KnowledgeTree:
             self._topic_to_pages[topic.id] += [page]
             self._page_to_topics[page.id] += [topic]
 
+    def disconnect_page(self, page : Page) -> None:
+        #Undoes connect_topic_and_page for every topic of the page. Pages are appended, so they are searched for from the end
+        for topic in self._page_to_topics.pop(page.id, []):
+            pages = self._topic_to_pages[topic.id]
+            for position in range(len(pages)-1, -1, -1):
+                if pages[position].id == page.id:
+                    del pages[position]
+                    break
+
     def get_page_topics(self, page : Page) -> list[Topic]:
         if isinstance(page, Page):
             return self._page_to_topics[page.id]
@@ -178,7 +210,13 @@ class KnowledgeTree:
         else:
             return [] if topic == self.root else self._topic_to_pages[topic]
 
+    def get_triples_by_edge_id(self) -> dict[int, Triple]:
+        #Every triple of the tree once, without building the nested Topic.triples lists
+        return {triple.predicate.id: triple for topic in self.nodes for triple in topic.get_own_triples() + list(topic._triples_to_children.values())}
+
     def get_max_layer(self):
+        if self._index != None:
+            return self._index.max_layer
         return max([self._topics[topic_id]["Layer"] for topic_id in self._topics])+1
 
     def add_website_trust_factor(self, website : Website, trust_factor):
@@ -191,6 +229,71 @@ class KnowledgeTree:
 
 
 
+class KnowledgeTreeIndex:
+    #Structure of a finished knowledge tree in arrays. Elements are referenced by their position in knowledge_tree.nodes
+    #Holds the layers, and the topics of every element as a bitmask over the topics, for get_layer, get_topics and same_topic
+    def __init__(self, knowledge_tree : KnowledgeTree):
+        nodes = knowledge_tree.nodes
+        self._root = knowledge_tree.root
+        self._position = {node.id: position for position, node in enumerate(nodes)}
+        topics = knowledge_tree.topics
+        topic_bits = {topic.id: 1 << bit for bit, topic in enumerate(topics)}
+        self._topics = [KnowledgeTreeIndex._element_topics(knowledge_tree, node) for node in nodes]
+        self._topic_masks = [0 if element_topics == None else sum(topic_bits[topic.id] for topic in element_topics) for element_topics in self._topics]
+        self._max_layer = max([knowledge_tree._topics[topic.id]["Layer"] for topic in topics]) + 1
+        self._layer_list = [self._max_layer if node == self._root else KnowledgeTreeIndex._element_layer(knowledge_tree, node) for node in nodes]
+        self._layers = numpy.array(self._layer_list, dtype=numpy.int64)
+
+    @property
+    def max_layer(self) -> int:
+        #Layer of the root
+        return self._max_layer
+
+    @property
+    def layers(self) -> numpy.ndarray:
+        return self._layers
+
+    def _element_topics(knowledge_tree : KnowledgeTree, element : Topic) -> list[Topic]:
+        if knowledge_tree.is_topic(element):
+            return [element]
+        elif knowledge_tree.is_atom(element):
+            return list(knowledge_tree._atoms[element.id]["Topics"].values())
+        elif knowledge_tree.is_subtopic(element):
+            return [knowledge_tree._subtopics[element.id]["Topic"]]
+        return None
+
+    def _element_layer(knowledge_tree : KnowledgeTree, element : Topic) -> int:
+        if knowledge_tree.is_topic(element):
+            return knowledge_tree._topics[element.id]["Layer"]
+        elif knowledge_tree.is_subtopic(element):
+            return knowledge_tree._subtopics[element.id]["Layer"]
+        return knowledge_tree._atoms[element.id]["Layer"]
+
+    def position(self, element : Union[Topic, int]) -> int:
+        element_id = element.id if isinstance(element, Topic) else element
+        if element_id not in self._position:
+            raise Exception("Element does not exist in the Knowledge Tree")
+        return self._position[element_id]
+
+    def get_layer(self, element : Topic) -> int:
+        return self._layer_list[self.position(element)]
+
+    def get_topics(self, element : Topic) -> list[Topic]:
+        if element.id not in self._position:
+            return None
+        element_topics = self._topics[self._position[element.id]]
+        return None if element_topics == None else list(element_topics)
+
+    def topic_mask(self, element : Topic) -> int:
+        return self._topic_masks[self.position(element)]
+
+    def same_topic(self, element_a : Topic, element_b : Topic) -> bool:
+        return (self.topic_mask(element_a) & self.topic_mask(element_b)) != 0
+
+
+
+
+
 class Topic:
     def __init__(self, id = None):
         self._id = Identifier(id)
@@ -199,6 +302,7 @@ class Topic:
         self._children : Dict[int, Topic] = {} #{id -> {"Topic": Topic, "Name": Str}}
         self._triples : list[Triple] = []
         self._triples_to_children : dict[int, Triple] = {} #{topic_id -> triple}
+        self._subtree_triples : tuple[Triple] = None    #Cache of triples, None when the subtree has changed
         self._node = Node(name = str(self.id), id=self.id)
 
     def __eq__(self, topic : Topic):
@@ -238,9 +342,46 @@ class Topic:
         return self._node
 
     @property
-    def triples(self) -> list[Triple]:
-        if len(self.children) == 0: return []
-        return self._triples + list(self._triples_to_children.values()) + [triple for child in self.children for triple in child.triples]
+    def triples(self) -> tuple[Triple]:
+        #Own triples, triples to the children and the children's triples, each triple once, in the order they are first met
+        #Leaves have none. Cached until a topic in the subtree gets a triple or a child
+        if self._subtree_triples is None:
+            Topic._cache_subtree_triples(self)
+        return self._subtree_triples
+
+    def _cache_subtree_triples(topic : Topic) -> None:
+        #Children before parents, without recursion, so deep trees do not hit the recursion limit
+        #A cached topic has a cached subtree, so the walk stops at cached topics
+        stack = [(topic, False)]
+        while len(stack) > 0:
+            element, children_done = stack.pop()
+            if element._subtree_triples is not None:
+                continue
+            if children_done:
+                element._subtree_triples = element._collect_subtree_triples()
+                continue
+            stack += [(element, True)]
+            stack += [(child, False) for child in reversed(element.children) if child._subtree_triples is None]
+
+    def _collect_subtree_triples(self) -> tuple[Triple]:
+        if len(self._children) == 0: return ()
+        triples = {}
+        for triple in self._triples + list(self._triples_to_children.values()):
+            triples.setdefault(triple.predicate.id, triple)
+        for child in self.children:
+            for triple in child._subtree_triples:
+                triples.setdefault(triple.predicate.id, triple)
+        return tuple(triples.values())
+
+    def _subtree_changed(self) -> None:
+        #Drops the cache of the topic and of every topic above it
+        stack = [self]
+        while len(stack) > 0:
+            element = stack.pop()
+            if element._subtree_triples is None:
+                continue
+            element._subtree_triples = None
+            stack += element.parents
 
     def get_child_triple(self, child) -> Triple:
         if child.id in self._children:
@@ -262,6 +403,7 @@ class Topic:
         self._children |= {child.id: {"Topic": child, "Name": None}}
         edge = Edge(self.node, child.node, "Is")
         self._triples_to_children[child.id] = Triple(self.node, child.node, edge)
+        self._subtree_changed()
         return edge
 
     def add_children(self, children : list[Topic]) -> None:
@@ -270,9 +412,11 @@ class Topic:
 
     def add_triple(self, triple : Triple) -> None:
         self._triples += [triple]
+        self._subtree_changed()
 
     def add_triples(self, triples : list[Triple]) -> None:
         self._triples += triples
+        self._subtree_changed()
 
     def add_parent_name(self, parent, name):
         self._parents[parent.id]["Name"]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import numpy
+
+
+
+
+class LinkMatrix:
+    #Link structure of pages or websites in CSR form, for vectorized analytics over a whole network
+    #Row i holds the links out of ids[i]: indices[indptr[i]:indptr[i+1]] are positions in ids and data the number of links to each
+    #ids are sorted. Links to or from ids that are not in the matrix are left out
+    def __init__(self, ids, from_ids, to_ids):
+        self._ids = numpy.unique(numpy.asarray(ids, dtype=numpy.int64))
+        from_ids = numpy.asarray(from_ids, dtype=numpy.int64)
+        to_ids = numpy.asarray(to_ids, dtype=numpy.int64)
+        rows = numpy.searchsorted(self._ids, from_ids)
+        columns = numpy.searchsorted(self._ids, to_ids)
+        known = self._is_known(rows, from_ids) & self._is_known(columns, to_ids)
+        self._indptr, self._indices, self._data = self._build_csr(rows[known], columns[known])
+
+    def from_links(ids, links, id_of) -> LinkMatrix:
+        #id_of maps a page to the id the link is counted on, like the page id or its website id
+        from_ids = numpy.fromiter((id_of(link.from_page) for link in links), dtype=numpy.int64, count=len(links))
+        to_ids = numpy.fromiter((id_of(link.to_page) for link in links), dtype=numpy.int64, count=len(links))
+        return LinkMatrix(ids, from_ids, to_ids)
+
+    def _is_known(self, positions, ids):
+        if len(self._ids) == 0:
+            return numpy.zeros(len(ids), dtype=bool)
+        return self._ids[numpy.minimum(positions, len(self._ids)-1)] == ids
+
+    def _build_csr(self, rows, columns):
+        nr_of_ids = len(self._ids)
+        pairs, counts = numpy.unique(rows * nr_of_ids + columns, return_counts=True)
+        indptr = numpy.zeros(nr_of_ids+1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(pairs // max(1, nr_of_ids), minlength=nr_of_ids), out=indptr[1:])
+        return indptr, (pairs % max(1, nr_of_ids)).astype(numpy.int32), counts.astype(numpy.int32)
+
+    @property
+    def ids(self) -> numpy.ndarray:
+        return self._ids
+
+    @property
+    def indptr(self) -> numpy.ndarray:
+        return self._indptr
+
+    @property
+    def indices(self) -> numpy.ndarray:
+        return self._indices
+
+    @property
+    def data(self) -> numpy.ndarray:
+        return self._data
+
+    @property
+    def csr(self):
+        return self._indptr, self._indices, self._data, self._ids
+
+    @property
+    def nr_of_nodes(self) -> int:
+        return len(self._ids)
+
+    @property
+    def nr_of_links(self) -> int:
+        return int(self._data.sum())
+
+    @property
+    def nr_of_unique_links(self) -> int:
+        return len(self._indices)
+
+    def position(self, id : int) -> int:
+        position = int(numpy.searchsorted(self._ids, id))
+        if position == len(self._ids) or self._ids[position] != id:
+            raise Exception(f"{id} is not in the link matrix")
+        return position
+
+    def get_linked_ids(self, id : int) -> numpy.ndarray:
+        position = self.position(id)
+        return self._ids[self._indices[self._indptr[position]:self._indptr[position+1]]]
+
+    def out_degrees(self, unique = False) -> numpy.ndarray:
+        #Links out of every id, or distinct ids linked to with unique
+        if unique:
+            return numpy.diff(self._indptr)
+        return numpy.bincount(self._rows(), weights=self._data, minlength=len(self._ids)).astype(numpy.int64)
+
+    def in_degrees(self, unique = False) -> numpy.ndarray:
+        return numpy.bincount(self._indices, weights = None if unique else self._data, minlength=len(self._ids)).astype(numpy.int64)
+
+    def transpose(self) -> LinkMatrix:
+        #Same links with rows holding the links into each id
+        transposed = LinkMatrix(self._ids, [], [])
+        transposed._indptr, transposed._indices, transposed._data = self._build_csr(numpy.repeat(self._indices, self._data), numpy.repeat(self._rows(), self._data))
+        return transposed
+
+    def aggregate(self, member_ids, group_ids, groups = None) -> LinkMatrix:
+        #Links between groups of ids, like bubbles of websites. member_ids[i] is in group group_ids[i], and an id can be in
+        #several groups or none. A link counts once for every (group of its from id, group of its to id), so links inside
+        #a group are on the diagonal. groups are the ids of the new matrix, the groups in group_ids if None
+        member_ids = numpy.asarray(member_ids, dtype=numpy.int64)
+        group_ids = numpy.asarray(group_ids, dtype=numpy.int64)
+        aggregated = LinkMatrix(group_ids if groups is None else groups, [], [])
+        member_positions = numpy.searchsorted(self._ids, member_ids)
+        group_positions = numpy.searchsorted(aggregated._ids, group_ids)
+        known = self._is_known(member_positions, member_ids) & aggregated._is_known(group_positions, group_ids)
+        order = numpy.argsort(member_positions[known], kind="stable")
+        member_groups = group_positions[known][order]
+        group_indptr = numpy.zeros(len(self._ids)+1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(member_positions[known], minlength=len(self._ids)), out=group_indptr[1:])
+        rows, columns = numpy.repeat(self._rows(), self._data), numpy.repeat(self._indices, self._data)
+        from_links, from_groups = LinkMatrix._expand_to_groups(rows, group_indptr, member_groups)
+        to_links, to_groups = LinkMatrix._expand_to_groups(columns[from_links], group_indptr, member_groups)
+        aggregated._indptr, aggregated._indices, aggregated._data = aggregated._build_csr(from_groups[to_links], to_groups)
+        return aggregated
+
+    def _expand_to_groups(positions, group_indptr, member_groups) -> tuple:
+        #(Index in positions, group position) for every group of every position
+        counts = group_indptr[positions+1] - group_indptr[positions]
+        links = numpy.repeat(numpy.arange(len(positions)), counts)
+        within = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        return links, member_groups[numpy.repeat(group_indptr[positions], counts) + within]
+
+    def _rows(self) -> numpy.ndarray:
+        return numpy.repeat(numpy.arange(len(self._ids)), numpy.diff(self._indptr))
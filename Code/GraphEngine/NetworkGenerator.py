@@ -1,51 +1,140 @@
-import random
 import numpy
 import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from GraphEngine.KnowledgeTreeStructures import *
 from GraphEngine.Structures import *
 from GraphEngine.Visualization import Visualize
+from GraphEngine.RandomStream import RandomStream
+from GraphEngine.ExternalLinkIndex import ExternalLinkIndex
+from GraphEngine.PageKnowledgeGraph import PageKnowledgeGraph
 
 
 
 
 class NetworkGenerator:
+    _worker_state : dict = {}   #CONFIG, knowledge tree and random stream of a worker process, see generate_websites_in_parallel
+
     def is_knowledge_satisfied(CONFIG, knowledge_tree : KnowledgeTree, network : Network) -> bool:
+        #network can also be the NetworkSkeleton of GraphEngine.generate_stream
         ratio = CONFIG["Network"]["Knowledge"]["EachTopicUsed"]["Minimum"]
-        tree_graph = Graph(triples = [triple for child in knowledge_tree.root.children for triple in child.triples])
-        network_graph = Graph(graphs = [page.graph for website in network.websites for page in website.pages])
-        return tree_graph.subset_of(network_graph)
+        if network.knowledge_coverage == None:
+            tree_edges = [triple.predicate for child in knowledge_tree.root.children for triple in child.triples]
+            network.set_knowledge_coverage(KnowledgeCoverage(tree_edges))
+        return network.knowledge_coverage.is_satisfied
 
 
 
-    def generate_website(CONFIG, knowledge_tree : KnowledgeTree) -> Website:
-        website_width_depth_ratio = NetworkGenerator._generate_website_width_depth_ratio(CONFIG) #Width and Depth
-        website_focus = NetworkGenerator._choose_website_focus(CONFIG, knowledge_tree)
-        nr_of_pages = NetworkGenerator._generate_number_of_pages(CONFIG)
-        page_size_average = NetworkGenerator._generate_page_size_average(CONFIG)
+    def generate_website(CONFIG, knowledge_tree : KnowledgeTree, rng : RandomStream) -> Website:
+        website_width_depth_ratio = NetworkGenerator._generate_website_width_depth_ratio(CONFIG, rng) #Width and Depth
+        website_focus = NetworkGenerator._choose_website_focus(CONFIG, knowledge_tree, rng)
+        nr_of_pages = NetworkGenerator._generate_number_of_pages(CONFIG, rng)
+        page_size_average = NetworkGenerator._generate_page_size_average(CONFIG, rng)
         website = Website()
         pool_of_topics = {website_focus.id: website_focus}
         while len(website.pages) < nr_of_pages:
-            page_size = NetworkGenerator._generate_page_size(CONFIG, page_size_average)
-            starting_topic = NetworkGenerator._choose_starting_topic(pool_of_topics)
-            page, topics = NetworkGenerator._generate_page(CONFIG, knowledge_tree, starting_topic, page_size, website_width_depth_ratio)
-            if NetworkGenerator._is_an_unique_page(page, website.pages):
+            page_size = NetworkGenerator._generate_page_size(CONFIG, page_size_average, rng)
+            starting_topic = NetworkGenerator._choose_starting_topic(pool_of_topics, rng)
+            page, topics = NetworkGenerator._generate_page(CONFIG, knowledge_tree, starting_topic, page_size, website_width_depth_ratio, rng)
+            if NetworkGenerator._is_an_unique_page(page, website):
                 NetworkGenerator._connect_topics_and_page(knowledge_tree, topics, page)
                 website.add_page(page)
                 pool_of_topics |= {topic.id: topic for topic in topics}
-        NetworkGenerator._generate_internal_links(CONFIG, knowledge_tree, website)
+        NetworkGenerator._generate_internal_links(CONFIG, knowledge_tree, website, rng)
+        return website
+
+    def generate_websites(CONFIG, knowledge_tree : KnowledgeTree, network : Network, rng : RandomStream) -> List[Website]:
+        #The next SatisfactionFrequency websites of the network, or of a NetworkSkeleton. Website i of the network draws
+        #from rng.child(i), so it does not matter which process generates it
+        website_index = network.nr_of_websites
+        return [NetworkGenerator.generate_website(CONFIG, knowledge_tree, rng.child(website_index + count)) for count in range(0, CONFIG["Network"]["SatisfactionFrequency"])]
+
+    def generate_websites_in_parallel(CONFIG, knowledge_tree : KnowledgeTree, network : Network, nr_of_workers : int, rng : RandomStream) -> None:
+        #Website i is generated from rng.child(i), described by a worker and rebuilt here in index order, and satisfaction is
+        #checked after every SatisfactionFrequency websites like the serial loop. So the websites have the same content
+        #as the serial ones, only the ids of the websites, pages and links differ
+        satisfaction_frequency = CONFIG["Network"]["SatisfactionFrequency"]
+        triples = knowledge_tree.get_triples_by_edge_id()
+        executor = NetworkGenerator._website_executor(CONFIG, knowledge_tree, nr_of_workers, rng)
+        descriptions = NetworkGenerator._website_descriptions(CONFIG, knowledge_tree, executor, satisfaction_frequency * nr_of_workers, rng, network.nr_of_websites)
+        try:
+            while NetworkGenerator.is_knowledge_satisfied(CONFIG, knowledge_tree, network) == False:
+                websites = [NetworkGenerator._build_website(knowledge_tree, triples, next(descriptions)) for _ in range(0, satisfaction_frequency)]
+                network.add_websites(websites)
+        finally:
+            descriptions.close()
+            if executor != None:
+                executor.shutdown(cancel_futures=True)
+
+    def _website_executor(CONFIG, knowledge_tree : KnowledgeTree, nr_of_workers : int, rng : RandomStream) -> ProcessPoolExecutor:
+        #With fork the workers inherit the knowledge tree instead of unpickling it
+        if nr_of_workers <= 1:
+            return None
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        return ProcessPoolExecutor(nr_of_workers, mp_context=context, initializer=NetworkGenerator._init_worker, initargs=(CONFIG, knowledge_tree, rng))
+
+    def _init_worker(CONFIG, knowledge_tree : KnowledgeTree, rng : RandomStream) -> None:
+        NetworkGenerator._worker_state = {"CONFIG": CONFIG, "KnowledgeTree": knowledge_tree, "RandomStream": rng}
+
+    def _describe_website_in_worker(website_index : int) -> dict:
+        state = NetworkGenerator._worker_state
+        return NetworkGenerator._describe_indexed_website(state["CONFIG"], state["KnowledgeTree"], website_index, state["RandomStream"])
+
+    def _website_descriptions(CONFIG, knowledge_tree : KnowledgeTree, executor : ProcessPoolExecutor, batch_size : int, rng : RandomStream, website_index : int = 0):
+        #Descriptions in website index order. The next batch is handed to the workers before the current one is used
+        pending = None
+        while True:
+            if executor == None:
+                yield NetworkGenerator._describe_indexed_website(CONFIG, knowledge_tree, website_index, rng)
+                website_index += 1
+                continue
+            if pending == None:
+                pending = [executor.submit(NetworkGenerator._describe_website_in_worker, index) for index in range(website_index, website_index + batch_size)]
+                website_index += batch_size
+            batch = pending
+            pending = [executor.submit(NetworkGenerator._describe_website_in_worker, index) for index in range(website_index, website_index + batch_size)]
+            website_index += batch_size
+            for future in batch:
+                yield future.result()
+
+    def _describe_indexed_website(CONFIG, knowledge_tree : KnowledgeTree, website_index : int, rng : RandomStream) -> dict:
+        #The website's pages are connected to the topics of the shared knowledge tree until it is described, so their ids
+        #must not be ids of real pages
+        with IdScope(IdAllocator.scratch()):
+            website = NetworkGenerator.generate_website(CONFIG, knowledge_tree, rng.child(website_index))
+        description = NetworkGenerator._describe_website(knowledge_tree, website)
+        for page in website.pages:
+            knowledge_tree.disconnect_page(page)
+        return description
+
+    def _describe_website(knowledge_tree : KnowledgeTree, website : Website) -> dict:
+        #Only ids and page positions, so it is cheap to send between processes
+        pages = website.pages
+        page_index = {page.id: index for index, page in enumerate(pages)}
+        return {"Pages": [[edge.id for edge in page.edges] for page in pages],
+                "Topics": [[topic.id for topic in knowledge_tree.get_page_topics(page)] for page in pages],
+                "FrontPage": page_index[website.front_page.id],
+                "InternalLinks": [(page_index[link.from_page.id], page_index[link.to_page.id]) for link in website.internal_links]}
+
+    def _build_website(knowledge_tree : KnowledgeTree, triples : Dict[int, Triple], description : dict) -> Website:
+        website = Website()
+        pages = [Page(Graph.union(triples = [triples[edge_id] for edge_id in edge_ids])) for edge_ids in description["Pages"]]
+        for page, topic_ids in zip(pages, description["Topics"]):
+            NetworkGenerator._connect_topics_and_page(knowledge_tree, [knowledge_tree.get_node(topic_id) for topic_id in topic_ids], page)
+            website.add_page(page)
+        website.add_front_page(pages[description["FrontPage"]])
+        for from_index, to_index in description["InternalLinks"]:
+            website.add_internal_link(pages[from_index], pages[to_index])
         return website
 
     def _connect_topics_and_page(knowledge_tree : KnowledgeTree, topics : List[Topic], page : Page):
         for topic in topics:
             knowledge_tree.connect_topic_and_page(topic, page)
 
-    def _is_an_unique_page(page : Page, pages : List[Page]):
-        for p in pages:
-            if page.graph == p.graph:
-                return False
-        return True
+    def _is_an_unique_page(page : Page, website : Website):
+        return website.has_page_content(page) == False
 
-    def _choose_website_focus(CONFIG, knowledge_tree : KnowledgeTree) -> Topic:
+    def _choose_website_focus(CONFIG, knowledge_tree : KnowledgeTree, rng : RandomStream) -> Topic:
         #Choose from the topics not yet used or just a random node?
         uniform_distribution = CONFIG["Network"]["Knowledge"]["UniformTopicDistribution"]
         nodes = knowledge_tree.nodes
@@ -53,52 +142,52 @@ class NetworkGenerator:
         node = knowledge_tree.root
         while node == knowledge_tree.root:
             if uniform_distribution == True:
-                node = nodes[numpy.random.randint(0, nr_of_nodes)]
+                node = nodes[rng.integers(0, nr_of_nodes)]
             else:
-                node = nodes[int((numpy.random.randint(0, nr_of_nodes)+numpy.random.randint(0, nr_of_nodes))/2)]
+                node = nodes[int((rng.integers(0, nr_of_nodes)+rng.integers(0, nr_of_nodes))/2)]
         return node
 
-    def _generate_website_width_depth_ratio(CONFIG):
-        return numpy.random.uniform(0, 1)
+    def _generate_website_width_depth_ratio(CONFIG, rng : RandomStream):
+        return rng.uniform(0, 1)
 
-    def _generate_number_of_pages(CONFIG):
+    def _generate_number_of_pages(CONFIG, rng : RandomStream):
         average = CONFIG["Network"]["Websites"]["Pages"]["Average"]
         minimum = CONFIG["Network"]["Websites"]["Pages"]["Minimum"]
-        return NetworkGenerator._generate_chi(minimum, average)
+        return NetworkGenerator._generate_chi(rng, minimum, average)
 
-    def _generate_page_size_average(CONFIG):
+    def _generate_page_size_average(CONFIG, rng : RandomStream):
         average = CONFIG["Network"]["Knowledge"]["Elements"]["Average"]
         minimum = CONFIG["Network"]["Knowledge"]["Elements"]["Minimum"]
         maximum = CONFIG["Network"]["Knowledge"]["Elements"]["Maximum"]
-        return NetworkGenerator._generate_chi(minimum, average, maximum)
+        return NetworkGenerator._generate_chi(rng, minimum, average, maximum)
 
-    def _generate_page_size(CONFIG, average):
+    def _generate_page_size(CONFIG, average, rng : RandomStream):
         minimum = CONFIG["Network"]["Knowledge"]["Elements"]["Minimum"]
         maximum = CONFIG["Network"]["Knowledge"]["Elements"]["Maximum"]
-        return NetworkGenerator._generate_chi(minimum, average, maximum)
+        return NetworkGenerator._generate_chi(rng, minimum, average, maximum)
 
-    def _generate_chi(minimum, average, maximum = None):
-        chi = int(numpy.random.chisquare(average))
+    def _generate_chi(rng : RandomStream, minimum, average, maximum = None):
+        chi = int(rng.chisquare(average))
         chi = minimum if chi < minimum else chi
         chi = maximum if maximum != None and chi > maximum else chi
         return chi
 
-    def _choose_starting_topic(pool_of_topics : Dict[int, Topic]) -> Topic:
-        return random.choice(list(pool_of_topics.values()))
+    def _choose_starting_topic(pool_of_topics : Dict[int, Topic], rng : RandomStream) -> Topic:
+        return rng.choice(list(pool_of_topics.values()))
     
-    def _generate_page(CONFIG, knowledge_tree : KnowledgeTree, starting_topic : Topic, page_size : int, width_depth_ratio) -> Page:
-        topics = NetworkGenerator._choose_topics(knowledge_tree, starting_topic, page_size, width_depth_ratio)
-        triples = NetworkGenerator._generate_triples_from_topics(CONFIG, topics)
-        return Page(Graph(triples = triples)), topics
+    def _generate_page(CONFIG, knowledge_tree : KnowledgeTree, starting_topic : Topic, page_size : int, width_depth_ratio, rng : RandomStream) -> Page:
+        topics = NetworkGenerator._choose_topics(knowledge_tree, starting_topic, page_size, width_depth_ratio, rng)
+        triples = NetworkGenerator._generate_triples_from_topics(CONFIG, topics, rng)
+        return Page(Graph.union(triples = triples)), topics
 
-    def _choose_topics(knowledge_tree : KnowledgeTree, main_topic : Topic, page_size : int, width_depth_ratio):
+    def _choose_topics(knowledge_tree : KnowledgeTree, main_topic : Topic, page_size : int, width_depth_ratio, rng : RandomStream):
         topic_pool = { main_topic.id: main_topic }
         child_parent_pool = { topic.id: topic for topic in main_topic.children + main_topic.parents} 
         while len(topic_pool) < page_size or NetworkGenerator._only_topic_is_root(knowledge_tree, topic_pool):
-            topic_a, topic_b = NetworkGenerator._pick_two_distinct_random_elements(child_parent_pool)
+            topic_a, topic_b = NetworkGenerator._pick_two_distinct_random_elements(child_parent_pool, rng)
             width_depth_a = NetworkGenerator._calc_width_depth(knowledge_tree, topic_pool | {topic_a.id: topic_a})
             width_depth_b = NetworkGenerator._calc_width_depth(knowledge_tree, topic_pool | {topic_b.id: topic_b})
-            if width_depth_ratio < numpy.random.uniform(0, 1):
+            if width_depth_ratio < rng.uniform(0, 1):
                 new_topic = topic_b if width_depth_a["Width"] < width_depth_b["Width"] else topic_a
             else:
                 new_topic = topic_b if width_depth_a["Depth"] < width_depth_b["Depth"] else topic_a
@@ -110,15 +199,15 @@ class NetworkGenerator:
     def _only_topic_is_root(knowledge_tree, topic_pool):
         return len(topic_pool) == 1 and knowledge_tree.root.id in topic_pool
 
-    def _pick_two_distinct_random_elements(child_parent_pool : Dict[int, Topic]):
+    def _pick_two_distinct_random_elements(child_parent_pool : Dict[int, Topic], rng : RandomStream):
         if len(child_parent_pool) == 1:
-            topic = random.choice(list(child_parent_pool.values()))
+            topic = rng.choice(list(child_parent_pool.values()))
             return topic, topic
         topic_a = None
         topic_b = None
         while topic_a == topic_b:
-            topic_a = random.choice(list(child_parent_pool.values()))
-            topic_b = random.choice(list(child_parent_pool.values()))
+            topic_a = rng.choice(list(child_parent_pool.values()))
+            topic_b = rng.choice(list(child_parent_pool.values()))
         return topic_a, topic_b
 
     def _calc_width_depth(knowledge_tree : KnowledgeTree, topics):
@@ -140,7 +229,7 @@ class NetworkGenerator:
 
 
 
-    def _generate_triples_from_topics(CONFIG, topics : List[Topic]):  #Name, triples, or part of triples - HAVENT IMPLEMENTED NAMES!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    def _generate_triples_from_topics(CONFIG, topics : List[Topic], rng : RandomStream):  #Name, triples, or part of triples - HAVENT IMPLEMENTED NAMES!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
         topic_subset_flag = CONFIG["Network"]["Knowledge"]["Page"]["ConnectionSubset"]
         topic_map = {topic.id for topic in topics}
         topic_triple_map : dict = {topic.id: {"from":{}, "to":{}} for topic in topics}
@@ -156,7 +245,7 @@ class NetworkGenerator:
 
         for topic_key, topic_tf_map in topic_triple_map.items():
             is_relations = [to_key for to_key, to_triples in topic_tf_map["to"].items() for triple in to_triples if triple.predicate.label == "Is"]
-            random.shuffle(is_relations)
+            rng.shuffle(is_relations)
             if len(is_relations) > 1:
                 #Find if the keys are connected and if so delete one of them from topic_triple_map
                 del_keys = []
@@ -177,43 +266,34 @@ class NetworkGenerator:
             for key, topic_map in topic_triple_map.items():
                 for to_key, to_list in topic_map["to"].items():
                     if len(to_list) > 1:
-                        topic_triple_map[key]["to"][to_key] = [random.choice(to_list)]
+                        topic_triple_map[key]["to"][to_key] = [rng.choice(to_list)]
 
         triples_to : list[Triple] = [triple for topic_map in topic_triple_map.values() for to_triples in topic_map["to"].values() for triple in to_triples]
         return triples_to
 
 
-    def _generate_internal_links(CONFIG, knowledge_tree : KnowledgeTree, website : Website):
-        structures = NetworkGenerator._choose_structures(CONFIG)
+    def _generate_internal_links(CONFIG, knowledge_tree : KnowledgeTree, website : Website, rng : RandomStream):
+        structures = NetworkGenerator._choose_structures(CONFIG, rng)
         front_page = NetworkGenerator._choose_front_page(knowledge_tree, website.pages)
         website.add_front_page(front_page)
-        width_depth_ratio = NetworkGenerator._internal_link_width_depth_ratio(structures)
-        NetworkGenerator._link_internal_pages(knowledge_tree, website, front_page, width_depth_ratio)
+        width_depth_ratio = NetworkGenerator._internal_link_width_depth_ratio(structures, rng)
+        NetworkGenerator._link_internal_pages(knowledge_tree, website, front_page, width_depth_ratio, rng)
         NetworkGenerator._apply_post_structures(knowledge_tree, website, structures)
 
-    def _link_internal_pages(knowledge_tree : KnowledgeTree, website : Website, front_page : Page, width_depth_ratio):
-        page_knowledge_graph = NetworkGenerator._website_to_page_knowledge_graph(knowledge_tree, website)
-        fifo_queue = [front_page.id]
+    def _link_internal_pages(knowledge_tree : KnowledgeTree, website : Website, front_page : Page, width_depth_ratio, rng : RandomStream):
+        page_knowledge_graph = PageKnowledgeGraph.from_website(knowledge_tree, website)
+        fifo_queue = [page_knowledge_graph.page_index(front_page.id)]
         while len(fifo_queue) > 0:
-            page_id = fifo_queue.pop()
-            children_ids = [child_id for child_id in page_knowledge_graph[page_id]] 
-            not_implemented_children = {}
-            children_implemented = {}
-            for child_id in children_ids:
-                if NetworkGenerator._connect_to_internal_page(page_knowledge_graph, width_depth_ratio, children_ids, not_implemented_children, page_id, child_id):
-                    children_implemented[child_id] = None
-                else:
-                    not_implemented_children[child_id] = None
-            for child_id in children_implemented:
-                website.add_internal_link(page_id, child_id)
-                if child_id not in fifo_queue:
-                    fifo_queue = [child_id] + fifo_queue
-                for id in children_implemented:
-                    if id != child_id and id in page_knowledge_graph[child_id]:
-                        del page_knowledge_graph[child_id][id]
-            for child_id in children_ids:
-                del page_knowledge_graph[child_id][page_id]
-            del page_knowledge_graph[page_id]
+            page_index = fifo_queue.pop()
+            children, shared_topics = page_knowledge_graph.row(page_index)
+            children_implemented = children[NetworkGenerator._connect_to_internal_pages(page_knowledge_graph, width_depth_ratio, children, shared_topics, rng)]
+            for child_index in children_implemented.tolist():
+                website.add_internal_link(page_knowledge_graph.page_id(page_index), page_knowledge_graph.page_id(child_index))
+                if child_index not in fifo_queue:
+                    fifo_queue = [child_index] + fifo_queue
+            page_knowledge_graph.remove_edges(children_implemented, children_implemented)
+            page_knowledge_graph.remove_edges(children, [page_index])
+            page_knowledge_graph.remove_page(page_index)
     
     def _apply_post_structures(knowledge_tree : KnowledgeTree, website : Website, structures):
         if structures["ToFrontPage"] == True:
@@ -227,69 +307,63 @@ class NetworkGenerator:
                     if page_a != page_b and page_b not in [link.to_page for link in page_a.internal_links]:
                         website.add_internal_link(page_a, page_b)
 
-    def _connect_to_internal_page(page_knowledge_graph, width_depth_ratio, children_ids, not_implemented_children, parent_id, child_id):
-        if len(page_knowledge_graph[child_id]) <= 2:    #Rank of child is 2 or below
-            return True
-        elif any([child_id in page_knowledge_graph[id] for id in children_ids if id != child_id and id not in not_implemented_children]) == False:   #Not connected to children
-            return True
-        elif numpy.random.uniform(0, 1.0001) < (NetworkGenerator._internal_link_probability(page_knowledge_graph, parent_id, child_id) * width_depth_ratio):   #chosen as link
-            return True
-        return False
-
-    def _internal_link_probability(page_knowledge_graph, parent_id, child_id):
-        children_total_score = sum([NetworkGenerator._internal_link_score(page_knowledge_graph, parent_id, id) for id in page_knowledge_graph[parent_id]])
-        probability = (NetworkGenerator._internal_link_score(page_knowledge_graph, parent_id, child_id))/children_total_score
-        return probability
-
-    def _internal_link_score(page_knowledge_graph, parent_id, child_id):
-        return len(page_knowledge_graph[child_id]) * page_knowledge_graph[parent_id][child_id]
-
-    def _website_to_page_knowledge_graph(knowledge_tree: KnowledgeTree, website : Website):
-        page_knowledge_graph = {page.id: {} for page in website.pages} 
-        topic_to_pages = {}
-        for page in website.pages:
-            for topic in knowledge_tree.get_page_topics(page):
-                if topic.id not in topic_to_pages:
-                    topic_to_pages[topic.id] = []
-                topic_to_pages[topic.id] += [page.id]
-        for topic_id in topic_to_pages:
-            for page_id_a in topic_to_pages[topic_id]:
-                for page_id_b in topic_to_pages[topic_id]:
-                    if page_id_a != page_id_b:
-                        if page_id_b not in page_knowledge_graph[page_id_a]:
-                            page_knowledge_graph[page_id_a][page_id_b] = 0
-                        page_knowledge_graph[page_id_a][page_id_b] += 1 
-        return page_knowledge_graph
-
-    def _internal_link_width_depth_ratio(structures):
+    def _connect_to_internal_pages(page_knowledge_graph : PageKnowledgeGraph, width_depth_ratio, children, shared_topics, rng : RandomStream) -> List[bool]:
+        #Decided child by child in row order, since a child that is not linked no longer counts as a connection for the next ones
+        ranks = page_knowledge_graph.degrees(children).tolist()
+        probabilities = NetworkGenerator._internal_link_probabilities(page_knowledge_graph, children, shared_topics).tolist()
+        from_children, to_children = page_knowledge_graph.edges_among(children)
+        connections = numpy.bincount(to_children, minlength=len(children)).tolist()    #From children that are not ruled out
+        children_of = numpy.searchsorted(from_children, numpy.arange(len(children)+1)).tolist()  #from_children is sorted
+        implemented = []
+        for child, rank in enumerate(ranks):
+            if rank <= 2:   #Rank of child is 2 or below
+                implemented += [True]
+            elif connections[child] == 0:   #Not connected to children
+                implemented += [True]
+            elif rng.uniform(0, 1.0001) < (probabilities[child] * width_depth_ratio):   #chosen as link
+                implemented += [True]
+            else:
+                implemented += [False]
+                for to_child in to_children[children_of[child]:children_of[child+1]].tolist():
+                    connections[to_child] -= 1
+        return implemented
+
+    def _internal_link_probabilities(page_knowledge_graph : PageKnowledgeGraph, children, shared_topics):
+        scores = NetworkGenerator._internal_link_scores(page_knowledge_graph, children, shared_topics)
+        return scores / scores.sum()
+
+    def _internal_link_scores(page_knowledge_graph : PageKnowledgeGraph, children, shared_topics):
+        return page_knowledge_graph.degrees(children) * shared_topics
+
+    def _internal_link_width_depth_ratio(structures, rng : RandomStream):
         if structures["Chain"] == True:
             return 0
         elif structures["Flat"] == True:
             return 1
         else:
-            return (numpy.random.uniform(0, 1.0001)+numpy.random.uniform(0, 1.0001))/2
+            return (rng.uniform(0, 1.0001)+rng.uniform(0, 1.0001))/2
 
-    def _choose_structures(CONFIG):
-        pre_structures = NetworkGenerator._choose_pre_structures(CONFIG)
-        post_structures = NetworkGenerator._choose_post_structures(CONFIG)
+    def _choose_structures(CONFIG, rng : RandomStream):
+        pre_structures = NetworkGenerator._choose_pre_structures(CONFIG, rng)
+        post_structures = NetworkGenerator._choose_post_structures(CONFIG, rng)
         return pre_structures | post_structures
 
-    def _choose_pre_structures(CONFIG):
-        to_frontpage_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["ToFrontPage"])
-        navigation_bar_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["NavigationBar"])
+    def _choose_pre_structures(CONFIG, rng : RandomStream):
+        to_frontpage_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["ToFrontPage"], rng)
+        navigation_bar_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["NavigationBar"], rng)
         return {"ToFrontPage": to_frontpage_flag, "NavigationBar": navigation_bar_flag}
 
-    def _choose_post_structures(CONFIG):
-        chain_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["Chain"])
-        flat_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["Flat"])
+    def _choose_post_structures(CONFIG, rng : RandomStream):
+        chain_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["Chain"], rng)
+        flat_flag = NetworkGenerator._structure_flag(CONFIG["Network"]["Websites"]["InternalLinks"]["Structures"]["Flat"], rng)
         post_structures = {"Chain": chain_flag, "Flat": flat_flag}
         while list(post_structures.values()).count(True) >= 2:
-            key = random.choice(list(post_structures.keys()))
+            key = rng.choice(list(post_structures.keys()))
             post_structures[key] = False
         return post_structures
 
-    def _structure_flag(probability):
-        return numpy.random.uniform(0, 1) < probability
+    def _structure_flag(probability, rng : RandomStream):
+        return rng.uniform(0, 1) < probability
 
     def _choose_front_page(knowledge_tree, pages):
         candidates = [(page, NetworkGenerator._page_dimensions(knowledge_tree, page)) for page in pages]
@@ -303,42 +377,52 @@ class NetworkGenerator:
         depth = sum([1/(layer+1) for layer in layers])
         return {"width": width, "depth": depth}
 
-    def generate_external_links(CONFIG, knowledge_tree : KnowledgeTree, network: Network) -> None:
+    def generate_external_links(CONFIG, knowledge_tree : KnowledgeTree, network: Network, rng : RandomStream) -> None:
+        link_index = ExternalLinkIndex.from_network(knowledge_tree, network)
+        for website_index, website in enumerate(network.websites):
+            NetworkGenerator.generate_website_external_links(CONFIG, knowledge_tree, website, link_index, rng.child(website_index))
+
+    def generate_website_external_links(CONFIG, knowledge_tree : KnowledgeTree, website : Website, link_index : ExternalLinkIndex, rng : RandomStream) -> None:
+        #Websites must get their external links in network order, since earlier links change the candidates of later websites
+        #rng is the website's own stream, see generate_external_links. Candidates are looked up in link_index, which is shared by all websites
+        #The topics of the pages are taken from link_index too, since a streamed website's pages are no longer connected to the knowledge tree
         min_knowledge_trust = CONFIG["Network"]["Websites"]["ExternalLinks"]["MinimumTrustFactor"]
         external_link_probability = min_knowledge_trust = CONFIG["Network"]["Websites"]["ExternalLinks"]["ExternalLinkProbability"]
-        for website in network.websites:
-            trust_factor = numpy.random.uniform(min_knowledge_trust, 1.0001)
-            knowledge_tree.add_website_trust_factor(website, trust_factor)
-            external_link_density = numpy.random.uniform(0, 1)
-            new_children = {}
-            topics = [topic for page in website.pages for topic in knowledge_tree.get_page_topics(page)]
-            unique_topic_children = [topic_child for topic in topics for topic_child in topic.children]
-            for page in website.pages:
-                page_topics = {topic.id: topic for topic in knowledge_tree.get_page_topics(page)}
-                page_topics_children = {_child_topic.id: None for key in page_topics for _child_topic in page_topics[key].children}
-                page_unique_topic_children = [topic_child for topic_child in unique_topic_children if topic_child.id in page_topics_children]
-                for topic_child in page_unique_topic_children:
-                    topic_parents = [topic for topic in topic_child.parents if topic.id in page_topics]
-                    for topic_parent in topic_parents:
-                        if numpy.random.uniform(1-external_link_probability, 1.0001) < NetworkGenerator._external_link_probability(knowledge_tree, website, external_link_density, topic_parent):
-                            external_pages = [page for page in knowledge_tree.get_topic_pages(topic_child) if page not in website.pages and page in knowledge_tree.get_topic_pages(topic_parent) and not any([edge.to_page.website == website for edge in page.website.external_links])]
-                            if len(external_pages) > 0:
-                                scores = [(external_page, NetworkGenerator._external_page_score(knowledge_tree, topic_parent, external_page, trust_factor)) for external_page in external_pages]
-                                scores.sort(key=lambda x:x[1], reverse=True)  
-                                website.add_external_link(page, scores[0][0])
-                                new_children[scores[0][0].id] = scores[0][0]
-                                break
+        trust_factor = rng.uniform(min_knowledge_trust, 1.0001)
+        knowledge_tree.add_website_trust_factor(website, trust_factor)
+        external_link_density = rng.uniform(0, 1)
+        website_index = link_index.website_index(website)
+        linked_websites = link_index.linked_websites(website_index)
+        parent_probabilities = {}
+        new_children = {}
+        website_page_topics = [link_index.page_topics(knowledge_tree, page_index) for page_index in link_index.website_pages(website_index)]
+        topics = [topic for page_topics in website_page_topics for topic in page_topics]
+        unique_topic_children = [topic_child for topic in topics for topic_child in topic.children]
+        for page, topics_of_page in zip(website.pages, website_page_topics):
+            page_topics = {topic.id: topic for topic in topics_of_page}
+            page_topics_children = {_child_topic.id: None for key in page_topics for _child_topic in page_topics[key].children}
+            page_unique_topic_children = [topic_child for topic_child in unique_topic_children if topic_child.id in page_topics_children]
+            for topic_child in page_unique_topic_children:
+                topic_parents = [topic for topic in topic_child.parents if topic.id in page_topics]
+                for topic_parent in topic_parents:
+                    if topic_parent.id not in parent_probabilities:     #Does not change while the website gets its links
+                        parent_probabilities[topic_parent.id] = NetworkGenerator._external_link_probability(knowledge_tree, link_index, website_index, external_link_density, topic_parent)
+                    if rng.uniform(1-external_link_probability, 1.0001) < parent_probabilities[topic_parent.id]:
+                        external_pages = link_index.candidate_pages(topic_child, topic_parent, website_index, linked_websites)
+                        if len(external_pages) > 0:
+                            scores = NetworkGenerator._external_page_scores(knowledge_tree, link_index, topic_parent, external_pages, trust_factor, rng)
+                            link = link_index.add_external_link(website, page, external_pages[numpy.argmax(scores)])  #First of the best, like a stable sort
+                            new_children[link.to_page.id] = link.to_page
+                            break
+            if len(new_children) > 0:
                 unique_topic_children = [topic for topic in unique_topic_children if topic.id not in new_children]
 
-    def _external_link_probability(knowledge_tree : KnowledgeTree, website : Website, external_link_density, topic_parent : Topic):
-        pages = knowledge_tree.get_topic_pages(topic_parent)
-        page_map = {page.id: page for page in website.pages}
-        website_intersections_at_topic = len([page for page in pages if page.id in page_map])
-        return external_link_density**(website_intersections_at_topic + math.log2(knowledge_tree.get_layer(topic_parent)))
-
-    def _external_page_score(knowledge_tree : KnowledgeTree, topic_parent : Topic, external_page : Page, trust_factor):
-        probability = numpy.random.uniform(0.5, 1)
-        external_page_topics = knowledge_tree.get_page_topics(external_page)
-        parent_layer = knowledge_tree.get_layer(topic_parent)
-        score = (parent_layer+sum([parent_layer - knowledge_tree.get_layer(topic) for topic in external_page_topics]))/(len(external_page_topics))
-        return trust_factor * score * probability
\ No newline at end of file
+    def _external_link_probability(knowledge_tree : KnowledgeTree, link_index : ExternalLinkIndex, website_index : int, external_link_density, topic_parent : Topic):
+        website_intersections_at_topic = link_index.nr_of_topic_pages_on_website(topic_parent, website_index)
+        return external_link_density**(website_intersections_at_topic + math.log2(link_index.topic_layer(knowledge_tree, topic_parent)))
+
+    def _external_page_scores(knowledge_tree : KnowledgeTree, link_index : ExternalLinkIndex, topic_parent : Topic, external_pages : numpy.ndarray, trust_factor, rng : RandomStream) -> numpy.ndarray:
+        #One probability per page, drawn in page order
+        probabilities = rng.uniform(0.5, 1, len(external_pages))
+        scores = link_index.page_scores(external_pages, link_index.topic_layer(knowledge_tree, topic_parent))
+        return trust_factor * scores * probabilities
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import numpy
+
+from GraphEngine.KnowledgeTreeStructures import *
+from GraphEngine.Structures import *
+
+
+
+
+class PageKnowledgeGraph:
+    #How many topics every two pages of a website share. NetworkGenerator links the pages of the website along it
+    #It is the product of the page x topic incidence matrix with its transpose, without the diagonal, kept in CSR form
+    #Pages are referenced by their position in the website. A row lists the neighbours by the first topic they share
+    #(topics in the order the pages meet them), then by position. Entries are removed by marking them dead
+    def __init__(self, page_ids, incidence_pages, incidence_topics):
+        #incidence_pages[i] is on topic incidence_topics[i]
+        self._page_ids = numpy.asarray(page_ids, dtype=numpy.int64)
+        self._page_index = {page_id: index for index, page_id in enumerate(self._page_ids.tolist())}
+        nr_of_pages = len(self._page_ids)
+        from_pages, to_pages, weights, first_topics = PageKnowledgeGraph._shared_topics(numpy.asarray(incidence_pages, dtype=numpy.int64), numpy.asarray(incidence_topics, dtype=numpy.int64), nr_of_pages)
+        order = numpy.lexsort((to_pages, first_topics, from_pages))
+        self._indptr = numpy.zeros(nr_of_pages+1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(from_pages, minlength=nr_of_pages), out=self._indptr[1:])
+        self._indices = to_pages[order]
+        self._data = weights[order]
+        self._alive = numpy.ones(len(self._indices), dtype=bool)
+        self._degrees = numpy.diff(self._indptr)
+        #Entry positions sorted by from page * nr of pages + to page, to find entries by their pages
+        self._entry_keys = from_pages[order] * nr_of_pages + self._indices
+        self._entry_order = numpy.argsort(self._entry_keys, kind="stable")
+        self._entry_keys = self._entry_keys[self._entry_order]
+
+    def from_website(knowledge_tree : KnowledgeTree, website : Website) -> PageKnowledgeGraph:
+        pages = website.pages
+        topic_ranks = {}
+        incidence_pages, incidence_topics = [], []
+        for page_index, page in enumerate(pages):
+            for topic in knowledge_tree.get_page_topics(page):
+                if topic.id not in topic_ranks:
+                    topic_ranks[topic.id] = len(topic_ranks)
+                incidence_pages += [page_index]
+                incidence_topics += [topic_ranks[topic.id]]
+        return PageKnowledgeGraph([page.id for page in pages], incidence_pages, incidence_topics)
+
+    def _shared_topics(incidence_pages, incidence_topics, nr_of_pages):
+        #Expand every topic into its page pairs, then sort and compress equal pairs into one entry with their count
+        order = numpy.lexsort((incidence_pages, incidence_topics))
+        pages, topics = incidence_pages[order], incidence_topics[order]
+        topic_sizes = numpy.bincount(topics) if len(topics) > 0 else numpy.zeros(0, dtype=numpy.int64)
+        topic_starts = numpy.cumsum(topic_sizes) - topic_sizes
+        repeats = topic_sizes[topics]
+        from_pages = numpy.repeat(pages, repeats)
+        pair_topics = numpy.repeat(topics, repeats)
+        within_topic = numpy.arange(len(from_pages)) - numpy.repeat(numpy.cumsum(repeats) - repeats, repeats)
+        to_pages = pages[numpy.repeat(topic_starts[topics], repeats) + within_topic]
+        different = from_pages != to_pages
+        from_pages, to_pages, pair_topics = from_pages[different], to_pages[different], pair_topics[different]
+        order = numpy.lexsort((pair_topics, to_pages, from_pages))
+        keys = from_pages[order] * nr_of_pages + to_pages[order]
+        firsts = numpy.flatnonzero(numpy.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) > 0 else numpy.zeros(0, dtype=numpy.int64)
+        weights = numpy.diff(numpy.append(firsts, len(keys)))
+        return from_pages[order][firsts], to_pages[order][firsts], weights, pair_topics[order][firsts]
+
+    @property
+    def nr_of_pages(self) -> int:
+        return len(self._page_ids)
+
+    def page_index(self, page_id : int) -> int:
+        return self._page_index[page_id]
+
+    def page_id(self, page_index : int) -> int:
+        return int(self._page_ids[page_index])
+
+    def row(self, page_index : int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        #(Neighbours, shared topics) of the live entries, in row order
+        start, end = self._indptr[page_index], self._indptr[page_index+1]
+        alive = self._alive[start:end]
+        return self._indices[start:end][alive], self._data[start:end][alive]
+
+    def degrees(self, page_indexes) -> numpy.ndarray:
+        return self._degrees[page_indexes]
+
+    def edges_among(self, page_indexes : numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        #Live entries between the given pages, as positions in page_indexes
+        local_index = numpy.full(self.nr_of_pages, -1, dtype=numpy.int64)
+        local_index[page_indexes] = numpy.arange(len(page_indexes))
+        starts, ends = self._indptr[page_indexes], self._indptr[page_indexes+1]
+        lengths = ends - starts
+        entries = numpy.repeat(starts - (numpy.cumsum(lengths) - lengths), lengths) + numpy.arange(lengths.sum())
+        from_local = numpy.repeat(numpy.arange(len(page_indexes)), lengths)
+        to_local = local_index[self._indices[entries]]
+        among = self._alive[entries] & (to_local >= 0)
+        return from_local[among], to_local[among]
+
+    def remove_edges(self, from_pages : numpy.ndarray, to_pages : numpy.ndarray) -> None:
+        #Every live entry from one of from_pages to one of to_pages
+        keys = (numpy.asarray(from_pages, dtype=numpy.int64)[:, None] * self.nr_of_pages + numpy.asarray(to_pages, dtype=numpy.int64)[None, :]).ravel()
+        positions = numpy.minimum(numpy.searchsorted(self._entry_keys, keys), max(0, len(self._entry_keys)-1))
+        found = positions[self._entry_keys[positions] == keys] if len(self._entry_keys) > 0 else positions[:0]
+        entries = numpy.unique(self._entry_order[found])
+        entries = entries[self._alive[entries]]
+        self._alive[entries] = False
+        numpy.subtract.at(self._degrees, numpy.searchsorted(self._indptr, entries, side="right") - 1, 1)
+
+    def remove_page(self, page_index : int) -> None:
+        #The row of the page, not the entries pointing to it
+        self._alive[self._indptr[page_index]:self._indptr[page_index+1]] = False
+        self._degrees[page_index] = 0
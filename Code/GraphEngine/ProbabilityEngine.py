@@ -2,11 +2,13 @@ import math
 import random
 import numpy
 
+from GraphEngine.RandomStream import RandomStream
+
 
 class ProbabilityEngine:
-    def HouseDistribution(minimum, maximum, uniform_area, sparsity):
+    def HouseDistribution(minimum, maximum, uniform_area, sparsity, rng : RandomStream):
         if maximum < minimum: maximum = minimum
-        numbers =  numpy.random.randint(minimum, maximum+1, 2)
+        numbers =  rng.integers(minimum, maximum+1, 2)
         return int((numbers[0]+numbers[1])/2)
 
 
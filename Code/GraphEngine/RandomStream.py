@@ -0,0 +1,58 @@
+from __future__ import annotations
+import zlib
+import numpy
+
+
+
+
+class RandomStream:
+    #Random numbers of one part of a generation, drawn from its own numpy Generator instead of the global random states
+    #A child stream is given by its keys alone: child("Websites", 3) is the same stream no matter which streams were
+    #used before it, or in which process it is made. So every stage, topic and website can be generated independently
+    def __init__(self, seed : int, keys : tuple = ()):
+        self._seed = seed
+        self._keys = tuple(keys)
+        self._generator = numpy.random.Generator(numpy.random.PCG64(numpy.random.SeedSequence(seed, spawn_key = self._keys)))
+
+    def child(self, *keys) -> RandomStream:
+        #Keys are ints or names
+        return RandomStream(self._seed, self._keys + tuple(RandomStream._key(key) for key in keys))
+
+    def _key(key) -> int:
+        if isinstance(key, str):
+            return zlib.crc32(key.encode())
+        if key < 0:
+            raise Exception("A stream key cannot be negative")
+        return int(key)
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def keys(self) -> tuple:
+        return self._keys
+
+    @property
+    def generator(self) -> numpy.random.Generator:
+        return self._generator
+
+    def uniform(self, low = 0.0, high = 1.0, size = None):
+        return self._generator.uniform(low, high, size)
+
+    def integers(self, low, high, size = None):
+        #high is excluded, like numpy.random.randint
+        return self._generator.integers(low, high, size)
+
+    def chisquare(self, df, size = None):
+        return self._generator.chisquare(df, size)
+
+    def choice(self, elements : list):
+        #One element, like random.choice
+        if len(elements) == 0:
+            raise Exception("Cannot choose from an empty list")
+        return elements[int(self._generator.integers(0, len(elements)))]
+
+    def shuffle(self, elements : list) -> None:
+        #In place, like random.shuffle
+        self._generator.shuffle(elements)
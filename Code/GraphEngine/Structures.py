@@ -1,6 +1,10 @@
-
+from __future__ import annotations
 from GraphEngine.KnowledgeGraph import *
+from GraphEngine.LinkMatrix import LinkMatrix
 
+import weakref
+import numpy
+from array import array
 from random import choice
 from string import ascii_letters, ascii_uppercase
 
@@ -30,11 +34,12 @@ class knowledge:
 
 
 class Page:
-    def __init__(self, knowledgeDB : Graph = None, external_links : List[object] = [], internal_links : List[object] = []):
-        self._id = Identifier()
+    def __init__(self, knowledgeDB : Graph = None, external_links : List[object] = [], internal_links : List[object] = [], id = None):
+        self._id = Identifier(id)
         if isinstance(knowledgeDB, Graph) == False:
             knowledgeDB = Graph()
         self._knowledge_graph = knowledgeDB
+        self._graph_view = FrozenGraph(knowledgeDB)
         self._page_content = None
         self._personal_link = Link(self)
         self._website = None
@@ -54,15 +59,19 @@ class Page:
 
     @property
     def graph(self):    #Not possible to change the graph after construction
-        return Graph(self._knowledge_graph.get_nodes(), self._knowledge_graph.get_edges())
+        return self._graph_view
 
     @property
     def nodes(self):
-        return self.graph.get_nodes()
+        return self._knowledge_graph.get_nodes()
     
     @property
     def edges(self):
-        return self.graph.get_edges()
+        return self._knowledge_graph.get_edges()
+
+    @property
+    def fingerprint(self):
+        return self._knowledge_graph.fingerprint
 
     @property
     def link(self):
@@ -81,19 +90,35 @@ class Page:
         return self._internal_link
 
     def get_node(self, node_id):
-        return self.graph.get_node(node_id)
+        return self._knowledge_graph.get_node(node_id)
 
     def set_website(self, website):
         self._website = website
 
-    def add_internal_link(self, link):
-        self._internal_link += [EstablishedLink(self, link)]
+    def add_internal_link(self, link, id = None):
+        established_link = EstablishedLink(self, link, id)
+        self._internal_link += [established_link]
+        if self._website != None:
+            self._website._internal_link_added(established_link)
+        return established_link
 
-    def add_external_link(self, link):
-        self._external_link += [EstablishedLink(self, link)]
+    def add_external_link(self, link, id = None):
+        established_link = EstablishedLink(self, link, id)
+        self._external_link += [established_link]
+        if self._website != None:
+            self._website._external_link_added(established_link)
+        return established_link
 
     def get_edges_between(self, node_id_A, node_id_B = None):
-        return self.graph.get_edges_between(node_id_A, node_id_B)
+        return self._knowledge_graph.get_edges_between(node_id_A, node_id_B)
+
+    def spilled(page_id : int, fingerprint : int) -> Page:
+        #Stands in for a page whose website is stored on disk, e.g. as the target of an external link, see NetworkSkeleton.page
+        #Only the id and the fingerprint are known. It is on no website and has no links
+        page = Page(id = page_id)
+        page._knowledge_graph = SpilledGraph(fingerprint)
+        page._graph_view = page._knowledge_graph
+        return page
 
     
 
@@ -101,16 +126,45 @@ class Page:
 
 
 
+class SpilledGraphError(AttributeError):
+    #An AttributeError, so hasattr, pickle and copy still work on a SpilledGraph
+    pass
+
+
+class SpilledGraph:
+    def __init__(self, fingerprint : int):
+        #Stands in for the knowledge graph of a spilled page
+        self._fingerprint = fingerprint
+
+    @property
+    def fingerprint(self) -> int:
+        return self._fingerprint
+
+    def __getattr__(self, name):
+        #Dunder lookups made by pickle and copy get the normal AttributeError
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        raise SpilledGraphError("The page has been spilled to disk. Load its website to get the knowledge graph")
+
+
+
+
 class Website:
-    def __init__(self, pages: List[Page] = [], internal_links = None, front_page = None ):
-        self._id = Identifier()
-        self._dict_of_pages = {page.id: page for page in pages}   #Impossible to have dublications since it is a set based on the ids
-        self._set_page_website()        
+    def __init__(self, pages: List[Page] = [], internal_links = None, front_page = None, id = None):
+        self._id = Identifier(id)
+        self._dict_of_pages = {}    #Impossible to have dublications since it is a set based on the ids
+        self._dict_of_fingerprints = {}
+        self._internal_links : List[EstablishedLink] = []
+        self._external_links : List[EstablishedLink] = []
+        self._containers = {}       #{id -> weakref to the Network or Bubble}, told about new pages and external links
+        self._version = 0
+        for page in pages:
+            self.add_page(page)
         self._front_page : Page = front_page
 
-    def _set_page_website(self):
-        for page_key in self._dict_of_pages:
-            self._dict_of_pages[page_key].set_website(self)
+    def __getstate__(self):
+        #Weak references cannot be pickled. Networks and bubbles register again when they are unpickled
+        return self.__dict__ | {"_containers": {}}
 
     @property
     def front_page(self):
@@ -129,10 +183,19 @@ class Website:
             return False
         return self.id == website.id
 
+    @property
+    def version(self) -> int:
+        #Changes every time a page or link is added
+        return self._version
+
     @property
     def pages(self):
         return [self._dict_of_pages[key] for key in self._dict_of_pages]
 
+    @property
+    def nr_of_pages(self) -> int:
+        return len(self._dict_of_pages)
+
     @property
     def page_ids(self):
         return [key for key in self._dict_of_pages]
@@ -147,15 +210,61 @@ class Website:
 
     @property
     def internal_links(self):
-        return [establishedLink for page in self.pages for establishedLink in page.internal_links] 
+        return list(self._internal_links)
 
     @property
     def external_links(self):
-        return list(set([establishedLink for page in self.pages for establishedLink in page.external_links]))
+        return list(self._external_links)
+
+    @property
+    def nr_of_internal_links(self) -> int:
+        return len(self._internal_links)
+
+    @property
+    def nr_of_external_links(self) -> int:
+        return len(self._external_links)
 
     def add_page(self, page: Page):
+        #The containers check the page before anything is changed
+        for container in self._live_containers():
+            container._check_page(self, page)
+        page.set_website(self)
+        if page.id in self._dict_of_pages: return
         self._dict_of_pages[page.id] = page
-        self._dict_of_pages[page.id].set_website(self)
+        if page.fingerprint not in self._dict_of_fingerprints:
+            self._dict_of_fingerprints[page.fingerprint] = page
+        self._internal_links += page.internal_links
+        self._external_links += page.external_links
+        self._version += 1
+        for container in self._live_containers():
+            container._page_added(self, page)
+
+    def _register_container(self, container) -> None:
+        self._containers[id(container)] = weakref.ref(container)
+
+    def _live_containers(self) -> list:
+        dead_ids = [container_id for container_id in self._containers if self._containers[container_id]() is None]
+        for container_id in dead_ids:
+            del self._containers[container_id]
+        return [self._containers[container_id]() for container_id in self._containers]
+
+    def _internal_link_added(self, link : EstablishedLink) -> None:
+        self._internal_links += [link]
+        self._version += 1
+
+    def _external_link_added(self, link : EstablishedLink) -> None:
+        self._external_links += [link]
+        self._version += 1
+        for container in self._live_containers():
+            container._external_link_added(self, link)
+
+    def page_link_matrix(self) -> LinkMatrix:
+        #Internal links between the pages of the website
+        return LinkMatrix.from_links(self.page_ids, self._internal_links, lambda page: page.id)
+
+    def has_page_content(self, page : Page) -> bool:
+        #True if a page with the same triples is on the website
+        return page.fingerprint in self._dict_of_fingerprints
 
     def add_front_page(self, page: Page):
         self._front_page = page
@@ -168,7 +277,7 @@ class Website:
             to_page = self.get_node(to_page)
         if from_page.website.id != to_page.website.id:
             raise Exception("Cannot add an external link as an external link")
-        from_page.add_internal_link(to_page.link)
+        return from_page.add_internal_link(to_page.link)
 
     def add_external_link(self, from_page : Page, to_page : Page):
         if not isinstance(from_page, Page):
@@ -176,7 +285,7 @@ class Website:
             to_page = self.get_node(to_page)
         if from_page.website.id == to_page.website.id:
             raise Exception("Cannot add an internal link as an external link")
-        from_page.add_external_link(to_page.link)
+        return from_page.add_external_link(to_page.link)
 
     def get_node(self, node_id):
         return self._dict_of_pages[node_id]
@@ -193,7 +302,22 @@ class Website:
 class Bubble:
     def __init__(self, websites: List[Website] = []):
         self._id = Identifier()
-        self._dict_of_websites = {website.id: website for website in websites}
+        self._dict_of_websites = {}
+        self._internal_links : List[EstablishedLink] = []
+        self._outgoing_links : dict[int, List[EstablishedLink]] = {}   #{to_website_id -> links} to websites outside the bubble
+        self._website_pair_index = WebsitePairIndex()
+        self._version = 0
+        for website in websites:
+            self.add_website(website)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for website in self.websites:
+            website._register_container(self)
+
+    @property
+    def version(self) -> int:
+        return self._version
 
     @property
     def id(self):
@@ -217,13 +341,11 @@ class Bubble:
     
     @property
     def edges(self):
-        edges = [WebsiteLink(establishedLink) for establishedLink in self.internal_links]
-        edge_dict = {(edge.from_page.website.id, edge.to_page.website.id): edge for edge in edges}
-        return [edge_dict[id] for id in edge_dict]
+        return self._website_pair_index.edges
 
     @property
     def internal_links(self):
-        return [establishedLink for website in self.websites for establishedLink in website.external_links if self.has_website(establishedLink.to_page.website)]
+        return list(self._internal_links)
 
     def __eq__(self, bubble):
         return self.websites == bubble.websites
@@ -233,55 +355,135 @@ class Bubble:
         return self._dict_of_websites[node_id]
 
     def get_edges_between(self, website_id_A, website_id_B = None):
-        if isinstance(website_id_A, EstablishedLink):
-            website_id_B = website_id_A.to_page.website.id
-            website_id_A = website_id_A.from_page.website.id
-        id_list = [website_id_A, website_id_B]
-        edges = [link for link in self.internal_links if link.from_page.website.id in id_list and link.to_page.website.id in id_list]
-        edge_dict = {(edge.from_page.website.id, edge.to_page.website.id): edge for edge in edges}
-        return [edge_dict[id] for id in edge_dict]
+        return self._website_pair_index.get_edges_between(website_id_A, website_id_B)
 
     def get_all_edges_between(self, website_id_A, website_id_B = None):
-        if isinstance(website_id_A, EstablishedLink):
-            website_id_B = website_id_A.to_page.website.id
-            website_id_A = website_id_A.from_page.website.id
-        id_list = [website_id_A, website_id_B]
-        return [link for link in self.internal_links if link.from_page.website.id in id_list and link.to_page.website.id in id_list]
+        return self._website_pair_index.get_all_edges_between(website_id_A, website_id_B)
 
     def has_website(self, website):
         return website.id in self._dict_of_websites
 
+    def page_link_matrix(self) -> LinkMatrix:
+        #Internal links of the websites and the links between them
+        links = [link for website in self.websites for link in website._internal_links] + self._internal_links
+        return LinkMatrix.from_links([page_id for website in self.websites for page_id in website.page_ids], links, lambda page: page.id)
+
+    def website_link_matrix(self) -> LinkMatrix:
+        return LinkMatrix.from_links(self.website_ids, self._internal_links, lambda page: page.website.id)
+
     def add_website(self, website):
+        if website.id in self._dict_of_websites: return
         self._dict_of_websites[website.id] = website
+        website._register_container(self)
+        for link in self._outgoing_links.pop(website.id, []):
+            self._add_internal_link(link)
+        for link in website.external_links:
+            self._external_link_added(website, link)
+        self._version += 1
+
+    def _check_page(self, website : Website, page : Page) -> None:
+        #The network of the website keeps pages on one website, a bubble has nothing to check
+        pass
+
+    def _page_added(self, website : Website, page : Page) -> None:
+        for link in page.external_links:
+            self._external_link_added(website, link)
+        self._version += 1
+
+    def _external_link_added(self, website : Website, link : EstablishedLink) -> None:
+        to_website = link.to_page.website
+        if self.has_website(to_website):
+            self._add_internal_link(link)
+        else:
+            self._outgoing_links.setdefault(to_website.id, []).append(link)
+        self._version += 1
+
+    def _add_internal_link(self, link : EstablishedLink) -> None:
+        self._internal_links += [link]
+        self._website_pair_index.add(link)
 
 
 
 
 class Network:
     def __init__(self, websites: List[Website] = [], bubbles : List[Bubble] = []):
-        self._dict_of_websites = {website.id: website for website in websites}
-        self._dict_of_bubbles = {bubble.id: bubble for bubble in bubbles}
-        self._add_bubble_websites_to_websites()
+        self._dict_of_websites = {}
+        self._dict_of_bubbles = {}
+        self._website_bubbles : dict[int, dict[int, Bubble]] = {}    #{website_id -> {bubble_id -> Bubble}}
+        self._dict_of_pages : dict[int, Page] = {}
+        self._page_websites : dict[int, Website] = {}   #{page_id -> Website}, the registry that keeps pages on one website
+        self._dict_of_fingerprints : dict[int, dict[int, Page]] = {}    #{fingerprint -> {page_id -> Page}}
+        self._internal_links : List[EstablishedLink] = []
+        self._website_pair_index = WebsitePairIndex()
+        self._knowledge_coverage : KnowledgeCoverage = None
+        self._version = 0
+        self.add_websites(websites + [website for bubble in bubbles for website in bubble.websites])
+        for bubble in bubbles:
+            self.add_bubble(bubble)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for website in self.websites:
+            website._register_container(self)
+
+    def _add_website(self, website : Website) -> None:
+        if website.id in self._dict_of_websites: return
+        self._dict_of_websites[website.id] = website
+        website._register_container(self)
+        for page in website.pages:
+            self._page_added(website, page)
+
+    def _check_page(self, website : Website, page : Page) -> None:
+        #Called by Website.add_page before the website is changed
+        if page.id in self._page_websites and self._page_websites[page.id].id != website.id:
+            raise Exception("A Page can only appear on one website at the time")
+
+    def _page_added(self, website : Website, page : Page) -> None:
+        self._dict_of_pages[page.id] = page
+        self._page_websites[page.id] = website
+        self._add_fingerprint(page)
+        if self._knowledge_coverage != None:
+            self._knowledge_coverage.cover_page(page)
+        for link in page.external_links:
+            self._add_internal_link(link)
+        self._version += 1
 
-        self._check_for_unique_pages(self._dict_of_websites)
-        self._check_bubble_websites_in_websites(self._dict_of_websites, self._dict_of_bubbles)
+    def _external_link_added(self, website : Website, link : EstablishedLink) -> None:
+        self._add_internal_link(link)
+        self._version += 1
 
-    def _add_bubble_websites_to_websites(self):
-        for bubble_key in self._dict_of_bubbles: 
-            for website in self._dict_of_bubbles[bubble_key].websites:
-                self._dict_of_websites[website.id] = website
+    def _add_internal_link(self, link : EstablishedLink) -> None:
+        self._internal_links += [link]
+        self._website_pair_index.add(link)
+
+    @property
+    def version(self) -> int:
+        #Changes every time a website, page or link is added
+        return self._version
 
     @property
     def websites(self):
         return [self._dict_of_websites[key] for key in self._dict_of_websites]
 
+    @property
+    def website_ids(self):
+        return list(self._dict_of_websites)
+
+    @property
+    def nr_of_websites(self) -> int:
+        return len(self._dict_of_websites)
+
     @property
     def bubbles(self):
         return [self._dict_of_bubbles[key] for key in self._dict_of_bubbles]
 
     @property
     def pages(self):
-        return [page for website in self.websites for page in website.pages]
+        return list(self._dict_of_pages.values())
+
+    @property
+    def nr_of_pages(self) -> int:
+        return len(self._dict_of_pages)
 
     @property
     def nodes(self):
@@ -289,68 +491,285 @@ class Network:
     
     @property
     def edges(self):
-        edges = [WebsiteLink(establishedLink) for establishedLink in self.internal_links]
-        edge_dict = {(edge.from_page.website.id, edge.to_page.website.id): edge for edge in edges}
-        return [edge_dict[id] for id in edge_dict]
+        return self._website_pair_index.edges
 
     @property
     def internal_links(self):
-        return [establishedLink for website in self.websites for establishedLink in website.external_links]
+        return list(self._internal_links)
 
     @property
     def nr_of_unique_external_links(self):
-        return len(self.edges)
+        return self._website_pair_index.nr_of_pairs
 
     @property
     def nr_of_external_links(self):
-        return len([link for website in self.websites for page in website.pages for link in page.external_links])
+        return len(self._internal_links)
+
+    @property
+    def knowledge_coverage(self):
+        return self._knowledge_coverage
+
+    def set_knowledge_coverage(self, knowledge_coverage : KnowledgeCoverage) -> None:
+        self._knowledge_coverage = knowledge_coverage
+        for website in self.websites:
+            knowledge_coverage.cover_website(website)
 
 
-    def _check_for_unique_pages(self, dict_of_websites):
-        dict_of_pages = {}
-        for web_key in dict_of_websites:
-            website = dict_of_websites[web_key]
-            for page in website.pages:
-                if page.id in dict_of_pages: raise Exception("A Page can only appear on one website at the time")
-                else: dict_of_pages[page.id] = True
+    def _check_for_unique_pages(self, websites : List[Website]):
+        #Only the pages of the new websites are checked, against each other and against the registry
+        page_websites = {}
+        for website in websites:
+            if website.id in self._dict_of_websites: continue
+            for page_id in website.page_ids:
+                if page_id in self._page_websites or page_websites.get(page_id, website.id) != website.id:
+                    raise Exception("A Page can only appear on one website at the time")
+                page_websites[page_id] = website.id
 
-    def _check_bubble_websites_in_websites(self, dict_of_websites, dict_of_bubbles):
-        for bubble_id in dict_of_bubbles:
-            for website in dict_of_bubbles[bubble_id].websites:
-                if website.id not in dict_of_websites:
+    def _check_bubble_websites_in_websites(self, bubbles : List[Bubble]):
+        for bubble in bubbles:
+            for website_id in bubble.website_ids:
+                if website_id not in self._dict_of_websites:
                     raise Exception("All websites inside of bubbles must first be added to the network")
 
+    def _add_fingerprint(self, page : Page) -> None:
+        if page.fingerprint not in self._dict_of_fingerprints:
+            self._dict_of_fingerprints[page.fingerprint] = {}
+        self._dict_of_fingerprints[page.fingerprint][page.id] = page
+
+    def get_duplicate_pages(self, page : Page) -> List[Page]:
+        #Pages anywhere in the network with the same triples as page
+        duplicates = self._dict_of_fingerprints.get(page.fingerprint, {})
+        return [duplicates[page_id] for page_id in duplicates if page_id != page.id]
+
     def add_website(self, website: Website) -> None:
-        self._dict_of_websites[website.id] = website
-        self._check_for_unique_pages(self._dict_of_websites)
+        self.add_websites([website])
+
+    def add_websites(self, websites : List[Website]) -> None:
+        #The whole batch is checked before any website is added
+        self._check_for_unique_pages(websites)
+        for website in websites:
+            self._add_website(website)
 
     def add_website_to_bubble(self, website: Website, bubble: Bubble) -> None:
+        if website.id not in self._dict_of_websites:
+            raise Exception("All websites inside of bubbles must first be added to the network")
         if bubble.id in self._dict_of_bubbles:
             self._dict_of_bubbles[bubble.id].add_website(website)
-        self._check_for_unique_pages(self._dict_of_websites)
-        self._check_bubble_websites_in_websites(self._dict_of_websites, self._dict_of_bubbles)
+            self._add_website_bubble(website.id, self._dict_of_bubbles[bubble.id])
+            self._version += 1
 
     def add_bubble(self, bubble: Bubble) -> None:
+        #Websites added to the bubble later must go through add_website_to_bubble to be seen by get_bubbles
+        self._check_bubble_websites_in_websites([bubble])
         self._dict_of_bubbles[bubble.id] = bubble
-        self._check_for_unique_pages(self._dict_of_websites)
-        self._check_bubble_websites_in_websites(self._dict_of_websites, self._dict_of_bubbles)
+        for website_id in bubble.website_ids:
+            self._add_website_bubble(website_id, bubble)
+        self._version += 1
+
+    def _add_website_bubble(self, website_id : int, bubble : Bubble) -> None:
+        if website_id not in self._website_bubbles:
+            self._website_bubbles[website_id] = {}
+        self._website_bubbles[website_id][bubble.id] = bubble
+
+    def page_link_matrix(self) -> LinkMatrix:
+        #Internal and external links between all pages of the network
+        links = [link for website in self.websites for link in website._internal_links] + self._internal_links
+        return LinkMatrix.from_links(list(self._dict_of_pages), links, lambda page: page.id)
+
+    def website_link_matrix(self) -> LinkMatrix:
+        #External links between the websites, data counts the page links behind each website pair
+        return LinkMatrix.from_links(list(self._dict_of_websites), self._internal_links, lambda page: page.website.id)
+
+    def bubble_link_matrix(self) -> LinkMatrix:
+        #External links between the bubbles. A link counts for every bubble of its from website and every bubble of its
+        #to website, so links inside a bubble are on the diagonal. Websites in no bubble are left out
+        website_ids, bubble_ids = self.bubble_memberships()
+        return self.website_link_matrix().aggregate(website_ids, bubble_ids, list(self._dict_of_bubbles))
+
+    def get_page(self, page_id : int) -> Page:
+        return self._dict_of_pages[page_id]
+
+    def get_website_of_page(self, page : Union[Page, int]) -> Website:
+        page_id = page.id if isinstance(page, Page) else page
+        return self._page_websites.get(page_id)
 
     def get_node(self, node_id):
         return self._dict_of_websites[node_id]
 
     def get_edges_between(self, website_id_A, website_id_B = None):
+        return self._website_pair_index.get_edges_between(website_id_A, website_id_B)
+
+    def get_bubbles(self, website):
+        bubbles = self._website_bubbles.get(website.id, {})
+        return [bubbles[bubble_id] for bubble_id in bubbles]
+
+    def get_bubble_ids(self, website) -> List[int]:
+        return list(self._website_bubbles.get(website.id, {}))
+
+    def bubble_memberships(self, websites = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        #(website ids, bubble ids) with one entry per membership, for websites given as Websites or ids (all websites if None)
+        website_ids = list(self._dict_of_websites) if websites is None else [website if isinstance(website, int) else website.id for website in websites]
+        memberships = [(website_id, bubble_id) for website_id in website_ids for bubble_id in self._website_bubbles.get(website_id, {})]
+        membership_array = numpy.array(memberships, dtype=numpy.int64).reshape(-1, 2)
+        return membership_array[:, 0], membership_array[:, 1]
+
+    def nr_of_bubbles(self, websites) -> numpy.ndarray:
+        website_ids = [website if isinstance(website, int) else website.id for website in websites]
+        return numpy.fromiter((len(self._website_bubbles.get(website_id, {})) for website_id in website_ids), dtype=numpy.int64, count=len(website_ids))
+
+    def in_bubble(self, websites, bubble) -> numpy.ndarray:
+        #True for every website that is in the bubble
+        bubble_id = bubble if isinstance(bubble, int) else bubble.id
+        website_ids = [website if isinstance(website, int) else website.id for website in websites]
+        return numpy.fromiter((bubble_id in self._website_bubbles.get(website_id, {}) for website_id in website_ids), dtype=bool, count=len(website_ids))
+
+
+
+
+
+class NetworkSkeleton:
+    #What GraphEngine.generate_stream keeps of a network whose websites are stored on disk: the ids of the websites and
+    #pages, and the fingerprint and topic ids of every page, in flat arrays. No Page, Website or link objects are kept,
+    #but it still grows with the network, by 8 bytes per page id, fingerprint and page topic
+    #Pages are referenced by their position. The pages of website i are at website_pages(i), in the order of website.pages
+    def __init__(self):
+        self._website_ids = array("q")
+        self._website_indptr = array("q", [0])
+        self._page_ids = array("q")
+        self._page_fingerprints = array("Q")
+        self._topic_ids = array("q")        #The topic ids of all pages one after the other, page i has [topic_indptr[i], topic_indptr[i+1])
+        self._topic_indptr = array("q", [0])
+        self._knowledge_coverage : KnowledgeCoverage = None
+
+    @property
+    def website_ids(self) -> List[int]:
+        return list(self._website_ids)
+
+    @property
+    def nr_of_websites(self) -> int:
+        return len(self._website_ids)
+
+    @property
+    def nr_of_pages(self) -> int:
+        return len(self._page_ids)
+
+    @property
+    def knowledge_coverage(self):
+        return self._knowledge_coverage
+
+    def set_knowledge_coverage(self, knowledge_coverage : KnowledgeCoverage) -> None:
+        if self.nr_of_pages > 0:
+            raise Exception("The knowledge coverage must be set before websites are added, the skeleton does not keep the triples of the pages")
+        self._knowledge_coverage = knowledge_coverage
+
+    def add_website(self, knowledge_tree, website : Website) -> None:
+        #The topics of the pages are read from knowledge_tree, so the pages can be disconnected from it afterwards
+        for page in website.pages:
+            self._page_ids.append(page.id)
+            self._page_fingerprints.append(page.fingerprint)
+            self._topic_ids.extend([topic.id for topic in knowledge_tree.get_page_topics(page)])
+            self._topic_indptr.append(len(self._topic_ids))
+            if self._knowledge_coverage != None:
+                self._knowledge_coverage.cover_page(page)
+        self._website_ids.append(website.id)
+        self._website_indptr.append(len(self._page_ids))
+
+    def website_pages(self, website_index : int) -> range:
+        return range(self._website_indptr[website_index], self._website_indptr[website_index+1])
+
+    def page_websites(self) -> numpy.ndarray:
+        #The website position of every page
+        return numpy.repeat(numpy.arange(self.nr_of_websites, dtype=numpy.int64), numpy.diff(numpy.array(self._website_indptr, dtype=numpy.int64)))
+
+    def page_topic_ids(self) -> tuple:
+        #(topic ids, indptr) as numpy arrays, see _topic_ids
+        return numpy.array(self._topic_ids, dtype=numpy.int64), numpy.array(self._topic_indptr, dtype=numpy.int64)
+
+    def topic_ids_of_page(self, page_index : int) -> List[int]:
+        return self._topic_ids[self._topic_indptr[page_index]:self._topic_indptr[page_index+1]].tolist()
+
+    def page(self, page_index : int) -> Page:
+        return Page.spilled(self._page_ids[page_index], self._page_fingerprints[page_index])
+
+
+
+
+class KnowledgeCoverage:
+    def __init__(self, edges : List[Edge] = []):
+        #Ground truth edges not yet found on any page. Pages are covered when their website is added to the network
+        self._uncovered_edges = {edge.id: None for edge in edges}
+        self._nr_of_edges = len(self._uncovered_edges)
+
+    @property
+    def is_satisfied(self) -> bool:
+        return len(self._uncovered_edges) == 0
+
+    @property
+    def nr_of_edges(self) -> int:
+        return self._nr_of_edges
+
+    @property
+    def nr_of_uncovered_edges(self) -> int:
+        return len(self._uncovered_edges)
+
+    @property
+    def uncovered_edge_ids(self) -> List[int]:
+        return [edge_id for edge_id in self._uncovered_edges]
+
+    def cover_page(self, page : Page) -> None:
+        if len(self._uncovered_edges) == 0: return
+        for edge in page.edges:
+            self._uncovered_edges.pop(edge.id, None)
+
+    def cover_website(self, website : Website) -> None:
+        for page in website.pages:
+            self.cover_page(page)
+
+
+
+
+class WebsitePairIndex:
+    def __init__(self):
+        #External links grouped on the websites they go between, so lookups for a website pair are O(result)
+        self._dict_of_links : dict[Tuple[int, int], List[EstablishedLink]] = {}   #{(from_website_id, to_website_id) -> links}
+        self._dict_of_website_links : dict[Tuple[int, int], WebsiteLink] = {}      #Made on first use, one per pair, for its latest link
+
+    @property
+    def nr_of_pairs(self) -> int:
+        return len(self._dict_of_links)
+
+    @property
+    def edges(self) -> List[WebsiteLink]:
+        #One per website pair, standing for the latest link like get_edges_between
+        return [self._website_link(website_pair) for website_pair in self._dict_of_links]
+
+    def add(self, link : EstablishedLink) -> None:
+        website_pair = (link.from_page.website.id, link.to_page.website.id)
+        if website_pair not in self._dict_of_links:
+            self._dict_of_links[website_pair] = []
+        self._dict_of_links[website_pair] += [link]
+        self._dict_of_website_links.pop(website_pair, None)
+
+    def _website_link(self, website_pair) -> WebsiteLink:
+        if website_pair not in self._dict_of_website_links:
+            self._dict_of_website_links[website_pair] = WebsiteLink(self._dict_of_links[website_pair][-1])
+        return self._dict_of_website_links[website_pair]
+
+    def _pair_links(self, website_id_A, website_id_B) -> List[List[EstablishedLink]]:
+        #Links both ways, the pair that got its first link first comes first
         if isinstance(website_id_A, EstablishedLink):
             website_id_B = website_id_A.to_page.website.id
             website_id_A = website_id_A.from_page.website.id
-        id_list = [website_id_A, website_id_B]
-        edges = [link for link in self.internal_links if link.from_page.website.id in id_list and link.to_page.website.id in id_list]
-        edge_dict = {(edge.from_page.website.id, edge.to_page.website.id): edge for edge in edges}
-        return [edge_dict[id] for id in edge_dict]
+        pairs = [(website_id_A, website_id_B)] if website_id_A == website_id_B else [(website_id_A, website_id_B), (website_id_B, website_id_A)]
+        pair_links = [self._dict_of_links[website_pair] for website_pair in pairs if website_pair in self._dict_of_links]
+        return sorted(pair_links, key=lambda links: links[0].id)
 
-    def get_bubbles(self, website):
-        bubbles = self.bubbles
-        return [bubble for bubble in self.bubbles if bubble.has_website(website)]
+    def get_edges_between(self, website_id_A, website_id_B = None) -> List[EstablishedLink]:
+        #The latest link for each direction
+        return [links[-1] for links in self._pair_links(website_id_A, website_id_B)]
 
+    def get_all_edges_between(self, website_id_A, website_id_B = None) -> List[EstablishedLink]:
+        return sorted([link for links in self._pair_links(website_id_A, website_id_B) for link in links], key=lambda link: link.id)
 
 
 
@@ -372,8 +791,9 @@ class Link:
 
 
 class EstablishedLink:
-    def __init__(self, from_page : Page, link : Link):
-        self._id = Identifier()
+    __slots__ = ("_id", "_link", "_from_page")
+    def __init__(self, from_page : Page, link : Link, id = None):
+        self._id = Identifier.next_id(id)
         self._link = link
         self._from_page = from_page
 
@@ -385,7 +805,7 @@ class EstablishedLink:
 
     @property
     def id(self):
-        return self._id.value
+        return self._id
 
     @property
     def link(self):
@@ -411,10 +831,13 @@ class EstablishedLink:
 
 
 class WebsiteLink(EstablishedLink):
+    __slots__ = ("_established_link",)
     def __init__(self, establishedLink):
-        super().__init__(establishedLink.from_page, establishedLink.link)
-        self._established_link = establishedLink
+        #Shares the id of the link it stands for, so no new id is drawn
         self._id = establishedLink._id
+        self._link = establishedLink.link
+        self._from_page = establishedLink.from_page
+        self._established_link = establishedLink
     @property
     def id_pair(self):
         return (self._established_link.from_page.website.id, self._established_link.to_page.website.id)
@@ -181,9 +181,9 @@ class NetworkVisualizer(GraphEngineVisualizer):
         strings = [ "Network", 
                     "Nr. of bubbles: " + str(len(network.bubbles)), 
                     "Nr. of websites: " + str(len(network.websites)), 
-                    "Nr. of pages: " + str(sum([len(website.pages) for website in network.websites])), 
-                    "Nr. of internal links: " + str(sum([len(website.internal_links) for website in network.websites])), 
-                    "Nr. of external links: " + str(sum([len(website.external_links) for website in network.websites])) ]
+                    "Nr. of pages: " + str(network.nr_of_pages), 
+                    "Nr. of internal links: " + str(sum([website.nr_of_internal_links for website in network.websites])), 
+                    "Nr. of external links: " + str(network.nr_of_external_links) ]
         return strings
 
     def _node_text(self, node):
@@ -5,7 +5,8 @@ import os
 
 from yaml import reader
 
-from GraphEngine.KnowledgeGraph import Node, Edge, Graph
+from GraphEngine.KnowledgeGraph import Node, Edge, Graph, IdScope
+from GraphEngine.Structures import Page, Website, Network
 
 
 
@@ -21,7 +22,12 @@ def load_json(file_addr):
         return json.load(file)
 
 
-def load_knowledge_graph(folder_addr, base_name):
+def load_knowledge_graph(folder_addr, base_name, id_allocator = None):
+    #The stored ids are registered in id_allocator, or in a fresh allocator so the loaded ids do not affect other graphs
+    with IdScope(id_allocator):
+        return _load_knowledge_graph(folder_addr, base_name)
+
+def _load_knowledge_graph(folder_addr, base_name):
     folder = folder_addr + base_name + "/"
     nodes_dict = load_json(folder + base_name + "_nodes")
     edges_dict = load_json(folder + base_name + "_edges")
@@ -79,17 +85,70 @@ def _edge_to_dict(edge):
 
 
 
-def save_website(website):
-    pass
-
-def load_website():
-    pass
-
-def save_network(network):
-    pass
-
-def load_network():
-    pass
+def save_website(website, folder_addr):
+    #Pages are stored as the ids of their knowledge graph edges, which are the edges of the knowledge tree
+    website_dict = {"id": website.id,
+                    "front_page": None if website.front_page is None else website.front_page.id,
+                    "pages": [[page.id, [edge.id for edge in page.edges]] for page in website.pages],
+                    "internal_links": [_link_to_list(link) for link in website.internal_links],
+                    "external_links": [_link_to_list(link) for link in website.external_links]}
+    save_dict_as_json(website_dict, folder_addr, _website_file_name(website.id))
+
+def save_external_links(website, folder_addr):
+    #Replaces the external links of a saved website, so a spilled website can be completed
+    website_dict = load_json(folder_addr + _website_file_name(website.id))
+    website_dict["external_links"] = [_link_to_list(link) for link in website.external_links]
+    save_dict_as_json(website_dict, folder_addr, _website_file_name(website.id))
+
+def load_website(folder_addr, website_id, triples, pages = None, id_allocator = None):
+    #triples maps edge ids to the knowledge tree triples, see triples_by_edge_id
+    #External links are only restored to pages found in the website itself or in pages {page_id -> Page}
+    website_dict = load_json(folder_addr + _website_file_name(website_id))
+    with IdScope(id_allocator):
+        website = _load_website(website_dict, triples)
+        _load_external_links(website_dict, website, {page.id: page for page in website.pages} | ({} if pages == None else pages))
+    return website
+
+def _load_website(website_dict, triples):
+    pages = [Page(Graph.union(triples = [triples[edge_id] for edge_id in edge_ids]), id = page_id) for page_id, edge_ids in website_dict["pages"]]
+    website = Website(pages, id = website_dict["id"])
+    page_map = {page.id: page for page in pages}
+    if website_dict["front_page"] != None:
+        website.add_front_page(page_map[website_dict["front_page"]])
+    for link_id, from_page_id, to_page_id in website_dict["internal_links"]:
+        page_map[from_page_id].add_internal_link(page_map[to_page_id].link, link_id)
+    return website
+
+def _load_external_links(website_dict, website, pages):
+    for link_id, from_page_id, to_page_id in website_dict["external_links"]:
+        if to_page_id in pages:
+            website.get_node(from_page_id).add_external_link(pages[to_page_id].link, link_id)
+
+def _link_to_list(link):
+    return [link.id, link.from_page.id, link.to_page.id]
+
+def _website_file_name(website_id):
+    return "website_" + str(website_id)
+
+def triples_by_edge_id(knowledge_tree):
+    return knowledge_tree.get_triples_by_edge_id()
+
+def save_network(network, folder_addr, save_websites = True):
+    #Without save_websites, network can also be a NetworkSkeleton
+    if save_websites:
+        for website in network.websites:
+            save_website(website, folder_addr)
+    save_dict_as_json({"websites": network.website_ids}, folder_addr, "network")
+
+def load_network(folder_addr, knowledge_tree, id_allocator = None):
+    triples = triples_by_edge_id(knowledge_tree)
+    website_dicts = [load_json(folder_addr + _website_file_name(website_id)) for website_id in load_json(folder_addr + "network")["websites"]]
+    with IdScope(id_allocator):
+        websites = [_load_website(website_dict, triples) for website_dict in website_dicts]
+        pages = {page.id: page for website in websites for page in website.pages}
+        for website_dict, website in zip(website_dicts, websites):
+            _load_external_links(website_dict, website, pages)
+    return Network(websites)
 
 def save_bubbles(bulles):
     pass